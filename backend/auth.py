@@ -1,12 +1,13 @@
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from database import get_db
 from database import SessionLocal
 from models import User
+from utils.principal_cache import principal_cache
+from utils.passwords import password_hasher
 import re
 
 # ================= CONFIG =================
@@ -15,8 +16,6 @@ SECRET_KEY = "SECRET123"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # 🔑 MUST MATCH LOGIN ROUTE EXACTLY
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
 
@@ -24,14 +23,20 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
 
 
 # ================= PASSWORD =================
+# bcrypt runs in the bounded process pool of utils/passwords.py (429 when full)
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-    
+    return password_hasher.verify_and_update(plain_password, hashed_password)[0]
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    """(ok, new_hash): new_hash is set when the stored hash uses old parameters."""
+    return password_hasher.verify_and_update(plain_password, hashed_password)
+
 
 def create_access_token(user_id: int):
     payload = {
@@ -42,10 +47,21 @@ def create_access_token(user_id: int):
 
 # ================= CURRENT USER =================
 
+def _principal_values(user: User) -> dict:
+    return {c.name: getattr(user, c.name) for c in User.__table__.columns}
+
+
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ):
+    """
+    Resolve the JWT to a User.
+    Served from the principal cache when possible, so most requests
+    need no DB round trip. The returned object is detached; endpoints
+    that modify the user must load it from their own session and then
+    call principal_cache.invalidate().
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="User not found",
@@ -56,18 +72,32 @@ def get_current_user(
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = payload.get("sub")
 
-        print("JWT user ID:",user_id)
-
         if user_id is None:
             raise credentials_exception
 
-    except JWTError:
+        user_id = int(user_id)
+
+    except (JWTError, ValueError):
         raise credentials_exception
 
-    # ✅ QUERY BY ID (NOT EMAIL)
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    values = principal_cache.get(user_id)
+    if values is None:
+        # ✅ QUERY BY ID (NOT EMAIL)
+        user = db.query(User).filter(User.id == user_id).first()
 
-    if user is None:
-        raise credentials_exception
+        if user is None:
+            raise credentials_exception
+
+        values = _principal_values(user)
+        principal_cache.set(user_id, values)
 
-    return user
\ No newline at end of file
+    return User(**values)
+
+
+def user_from_token(token: str) -> User:
+    """get_current_user for long-lived requests that hold no session."""
+    db = SessionLocal()
+    try:
+        return get_current_user(token, db)
+    finally:
+        db.close()
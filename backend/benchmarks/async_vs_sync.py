@@ -0,0 +1,117 @@
+"""
+Sync vs async read throughput on the same dataset.
+
+Seeds the synthetic dataset once (benchmarks/datagen.py), then runs the
+same burst of dashboard/insights reads against the app twice: with
+DB_ASYNC=false and DB_ASYNC=true. Each mode runs in its own process
+because DB_ASYNC is read at import.
+
+    cd backend
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.async_vs_sync
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.datagen import SYNTH_EMAIL_LIKE, seed, use_database
+
+READ_ENDPOINTS = [
+    "/dashboard/summary",
+    "/insights/monthly-cashflow",
+    "/insights/spending-by-category",
+    "/insights/top-merchants",
+    "/insights/burn-rate",
+    "/alerts/unread-count",
+    "/transactions/?limit=20",
+]
+
+
+async def drive(requests: int, concurrency: int):
+    import httpx
+
+    import main
+    from auth import create_access_token
+    from database import SessionLocal
+    from models import User
+
+    db = SessionLocal()
+    user_ids = [u.id for u in db.query(User.id).filter(User.email.like(SYNTH_EMAIL_LIKE))]
+    db.close()
+
+    endpoints = READ_ENDPOINTS
+
+    tokens = [create_access_token(uid) for uid in user_ids]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                r = await client.get(
+                    endpoints[i % len(endpoints)],
+                    headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+                )
+                latencies.append(time.perf_counter() - start)
+                if r.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "mode": "async" if os.getenv("DB_ASYNC", "false") == "true" else "sync",
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--txns", type=int, default=1000, help="typical transactions per account")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    use_database()
+    if args.child:
+        print(json.dumps(asyncio.run(drive(args.requests, args.concurrency))))
+        return
+
+    seed(args.users, args.txns)
+
+    results = []
+    for mode in ("false", "true"):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.async_vs_sync", "--child",
+             "--requests", str(args.requests),
+             "--concurrency", str(args.concurrency)],
+            # measure the app, not the rate limiter
+            env={"RATE_LIMIT_ENABLED": "false", **os.environ, "DB_ASYNC": mode},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
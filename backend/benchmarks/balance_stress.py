@@ -0,0 +1,163 @@
+"""
+Concurrency stress check for balance updates.
+
+Fires thousands of parallel POST /transactions/ (and some reward
+redemptions) at ONE account and then checks that the final balance is
+exactly the opening balance plus every accepted credit minus every
+accepted debit, and that it matches the transactions table. The balance
+is read through the ledger (snapshot + entries since). Exits 1 on
+any mismatch. Failed requests are fine (e.g. lock timeouts on SQLite),
+lost updates are not.
+
+    cd backend
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.balance_stress
+    DATABASE_URL=sqlite:////tmp/stress.db python -m benchmarks.balance_stress --requests 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+OPENING_BALANCE = Decimal("1000000.00")
+
+
+def setup():
+    import models
+    from database import SessionLocal, engine
+    from utils.balances import add_reward_points
+    from utils.ledger import open_account
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        email = f"stress{int(time.time() * 1000)}@example.com"
+        user = models.User(name="stress", email=email, password="x", phone=email)
+        db.add(user)
+        db.flush()
+
+        account = models.Account(
+            bank_name="Stress Bank",
+            account_type="savings",
+            user_id=user.id
+        )
+        open_account(db, account, OPENING_BALANCE)
+
+        add_reward_points(db, user.id, "Bank Rewards", 0)
+        db.commit()
+        return user.id, account.id
+    finally:
+        db.close()
+
+
+def ledger_balance(account_id: int):
+    from sqlalchemy import case, func, select
+
+    from database import SessionLocal
+    from models import Transaction
+    from utils.ledger import live_balance
+
+    db = SessionLocal()
+    try:
+        stored = live_balance(db, account_id)
+        net = db.scalar(
+            select(func.coalesce(func.sum(case(
+                (Transaction.txn_type == "credit", Transaction.amount),
+                else_=-Transaction.amount
+            )), 0))
+            .where(Transaction.account_id == account_id)
+        )
+        return Decimal(str(stored)), OPENING_BALANCE + Decimal(str(net))
+    finally:
+        db.close()
+
+
+async def fire(user_id: int, account_id: int, requests: int, concurrency: int):
+    import httpx
+
+    import main
+    from auth import create_access_token
+
+    headers = {"Authorization": f"Bearer {create_access_token(user_id)}"}
+    rng = random.Random(7)
+    plan = []
+    for _ in range(requests):
+        if rng.random() < 0.05:
+            plan.append(("redeem", 10 * rng.randint(1, 5)))
+        else:
+            amount = Decimal(rng.randint(1, 500000)) / 100
+            plan.append((rng.choice(["credit", "debit"]), amount))
+
+    semaphore = asyncio.Semaphore(concurrency)
+    expected = OPENING_BALANCE
+    status_counts = {}
+
+    transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://stress") as client:
+        async def one(kind, value):
+            nonlocal expected
+            async with semaphore:
+                if kind == "redeem":
+                    r = await client.post(
+                        "/rewards/redeem",
+                        params={"account_id": account_id, "points": value},
+                        headers=headers
+                    )
+                    delta = Decimal(r.json()["credited_amount"]) if r.status_code == 200 else 0
+                else:
+                    r = await client.post("/transactions/", headers=headers, json={
+                        "account_id": account_id,
+                        "amount": str(value),
+                        "txn_type": kind,
+                        "merchant": "Stress",
+                    })
+                    delta = value if kind == "credit" else -value
+                status_counts[r.status_code] = status_counts.get(r.status_code, 0) + 1
+                if r.status_code == 200:
+                    expected += delta
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(kind, value) for kind, value in plan))
+        elapsed = time.perf_counter() - started
+
+    return expected, status_counts, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    # thousands of requests from one user are the point here
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    from database import DATABASE_URL
+    if DATABASE_URL == "sqlite://" or ":memory:" in DATABASE_URL:
+        sys.exit("use a file or server database: an in-memory SQLite DB is one shared connection")
+
+    user_id, account_id = setup()
+    expected, status_counts, elapsed = asyncio.run(
+        fire(user_id, account_id, args.requests, args.concurrency)
+    )
+    stored, from_ledger = ledger_balance(account_id)
+
+    ok = stored == expected == from_ledger
+    print(json.dumps({
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "status_counts": status_counts,
+        "throughput_rps": round(args.requests / elapsed, 1),
+        "expected_balance": str(expected),
+        "stored_balance": str(stored),
+        "ledger_balance": str(from_ledger),
+        "ok": ok,
+    }, indent=2))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Synthetic banking dataset for the benchmark suite.
+
+Seeds "synth<n>@example.com" users with accounts, transactions, bills,
+budgets, reward points and alerts, deterministic for a given --seed:
+
+- 1-3 accounts per user, lognormal opening balances
+- transactions per account are lognormal around --txns (a few very
+  active users, many quiet ones); a monthly salary credit, debits
+  spread over the last --days days, mostly in the evening
+- merchants follow a Zipf-like popularity within each category and
+  amounts are lognormal around the category's typical spend
+- bills due from 10 days ago to 30 days ahead, budgets for this month,
+  alerts of which about 70% are already read
+
+Writes go through the same helpers as the app (ledger entries, monthly
+summaries), then the ledger snapshots are compacted, so reads see the
+steady state rather than a freshly loaded ledger.
+
+Uses DATABASE_URL (point it at a local Postgres), or falls back to the
+SQLite file BENCH_SQLITE when it is not set. This is the one dataset of
+the benchmarks: suite.py, async_vs_sync.py and query_plans.py all seed
+through seed().
+
+    cd backend
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.datagen --users 200
+    python -m benchmarks.datagen --users 50 --txns 100      # SQLite fallback
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+
+SYNTH_EMAIL = "synth{n}@example.com"
+SYNTH_EMAIL_LIKE = "synth%@example.com"
+BENCH_SQLITE = os.getenv("BENCH_SQLITE", "/tmp/banking-bench.db")
+
+# category -> (merchants by popularity, typical amount)
+SPEND = {
+    "Food": (["Swiggy", "Zomato", "Starbucks", "Dominos", "Chai Point"], 450),
+    "Groceries": (["BigBasket", "DMart", "Blinkit", "Zepto"], 1100),
+    "Shopping": (["Amazon", "Flipkart", "Myntra", "Croma"], 1800),
+    "Travel": (["Uber", "Ola", "IRCTC", "IndiGo"], 900),
+    "Utilities": (["Airtel", "Jio", "Tata Power", "BESCOM"], 1200),
+    "Entertainment": (["Netflix", "BookMyShow", "Spotify"], 500),
+}
+CATEGORY_WEIGHTS = {
+    "Food": 30, "Groceries": 20, "Shopping": 15, "Travel": 15, "Utilities": 10, "Entertainment": 10,
+}
+ACCOUNT_TYPES = ["savings", "current", "credit"]
+BANKS = ["HDFC Bank", "ICICI Bank", "State Bank", "Axis Bank", "Kotak Bank"]
+
+
+def use_database() -> str:
+    """Call before importing any app module: they bind the engine at import."""
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{BENCH_SQLITE}")
+    return os.environ["DATABASE_URL"]
+
+
+def lognormal(rng, typical, spread=0.6):
+    return round(rng.lognormvariate(math.log(typical), spread), 2)
+
+
+def zipf_choice(rng, items):
+    return rng.choices(items, weights=[1 / rank for rank in range(1, len(items) + 1)])[0]
+
+
+def synth_transactions(rng, account_id, count, days, now):
+    salary = lognormal(rng, 60000, 0.4)
+    months = max(1, days // 30)
+    rows = [
+        {
+            "account_id": account_id,
+            "amount": salary,
+            "txn_type": "credit",
+            "merchant": "Employer",
+            "description": "Salary",
+            "category": "Salary",
+            "currency": "INR",
+            "txn_date": (now - timedelta(days=30 * m)).replace(day=1, hour=9, minute=0),
+        }
+        for m in range(months)
+    ]
+
+    categories = list(CATEGORY_WEIGHTS)
+    weights = list(CATEGORY_WEIGHTS.values())
+    for _ in range(count):
+        category = rng.choices(categories, weights=weights)[0]
+        merchants, typical = SPEND[category]
+        refund = rng.random() < 0.03
+        when = now - timedelta(days=rng.randrange(days))
+        rows.append({
+            "account_id": account_id,
+            "amount": lognormal(rng, typical),
+            "txn_type": "credit" if refund else "debit",
+            "merchant": zipf_choice(rng, merchants),
+            "description": "Refund" if refund else None,
+            "category": category,
+            "currency": "INR",
+            "txn_date": when.replace(
+                hour=int(rng.triangular(7, 23, 20)), minute=rng.randrange(60), second=rng.randrange(60)
+            ),
+        })
+    return rows
+
+
+def seed_categories(db):
+    from models import Category
+
+    existing = {name for (name,) in db.query(Category.name)}
+    for category, (merchants, _) in SPEND.items():
+        if category not in existing:
+            db.add(Category(name=category, keywords=",".join(m.lower() for m in merchants)))
+
+
+def seed(users: int = 200, txns: int = 200, days: int = 365, seed: int = 42, batch: int = 50) -> dict:
+    """Create the dataset unless it is already there. Returns row counts."""
+    from sqlalchemy import insert, select, update, func
+
+    import models
+    from database import SessionLocal, engine
+    from utils.aggregates import rebuild_monthly_summaries
+    from utils.alert_helper import create_alerts
+    from utils.balances import add_reward_points
+    from utils.ledger import compact_all, open_account, post_transactions
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        have = db.scalar(
+            select(func.count(models.User.id)).where(models.User.email.like(SYNTH_EMAIL_LIKE))
+        )
+        if have >= users:
+            return counts(db)
+
+        rng = random.Random(seed)
+        now = datetime.utcnow()
+        today = date.today()
+        seed_categories(db)
+
+        for n in range(have, users):
+            email = SYNTH_EMAIL.format(n=n)
+            user = models.User(name=f"Synth {n}", email=email, password="x", phone=email)
+            db.add(user)
+            db.flush()
+
+            n_accounts = 1 + (rng.random() < 0.5) + (rng.random() < 0.2)
+            for a in range(n_accounts):
+                account = models.Account(
+                    bank_name=rng.choice(BANKS),
+                    account_type=ACCOUNT_TYPES[a],
+                    user_id=user.id
+                )
+                open_account(db, account, lognormal(rng, 50000, 0.8))
+
+                count = max(1, int(rng.lognormvariate(math.log(txns), 0.7)))
+                rows = db.execute(insert(models.Transaction).returning(
+                    models.Transaction.id,
+                    models.Transaction.account_id,
+                    models.Transaction.txn_type,
+                    models.Transaction.amount
+                ), synth_transactions(rng, account.id, count, days, now)).all()
+                post_transactions(db, rows)
+
+            db.add_all(
+                models.Bill(
+                    user_id=user.id,
+                    biller_name=zipf_choice(rng, SPEND["Utilities"][0]),
+                    due_date=due,
+                    amount_due=lognormal(rng, 1500),
+                    status="paid" if due < today and rng.random() < 0.8 else "upcoming",
+                    auto_pay=rng.random() < 0.3
+                )
+                for due in (today + timedelta(days=rng.randint(-10, 30)) for _ in range(rng.randint(2, 6)))
+            )
+            db.add_all(
+                models.Budget(
+                    user_id=user.id,
+                    month=today.month,
+                    year=today.year,
+                    category=category,
+                    limit_amount=lognormal(rng, SPEND[category][1] * 12, 0.3),
+                    spent_amount=0
+                )
+                for category in rng.sample(list(SPEND), 3)
+            )
+            add_reward_points(db, user.id, "Bank Rewards", rng.randint(0, 5000))
+            create_alerts(db, [
+                {
+                    "user_id": user.id,
+                    "alert_type": rng.choice(["large_transaction", "bill_due", "budget_exceeded"]),
+                    "title": "Synthetic alert",
+                    "message": f"synthetic alert {i}",
+                    "severity": rng.choice(["info", "warning"])
+                }
+                for i in range(rng.randint(5, 30))
+            ])
+
+            if (n + 1) % batch == 0:
+                db.commit()
+
+        # roughly 70% of alerts already read
+        db.execute(
+            update(models.Alert)
+            .where(
+                models.Alert.id % 10 < 7,
+                models.Alert.user_id.in_(
+                    select(models.User.id).where(models.User.email.like(SYNTH_EMAIL_LIKE))
+                )
+            )
+            .values(is_read=True)
+        )
+        rebuild_monthly_summaries(db)
+        db.commit()
+        compact_all(db)
+        return counts(db)
+    finally:
+        db.close()
+
+
+def counts(db) -> dict:
+    from sqlalchemy import func, select
+
+    import models
+
+    return {
+        table.__tablename__: db.scalar(select(func.count()).select_from(table))
+        for table in (
+            models.User, models.Account, models.Transaction, models.Bill,
+            models.Budget, models.Alert, models.LedgerEntry
+        )
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--txns", type=int, default=200, help="typical transactions per account")
+    parser.add_argument("--days", type=int, default=365, help="history length")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    use_database()
+    started = time.perf_counter()
+    rows = seed(args.users, args.txns, args.days, args.seed)
+    print(json.dumps({"rows": rows, "seconds": round(time.perf_counter() - started, 1)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
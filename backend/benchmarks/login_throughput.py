@@ -0,0 +1,130 @@
+"""
+Login throughput vs password hashing workers.
+
+Fires concurrent POST /users/login for one user through the app with the
+hashing pool (utils/passwords.py) resized to each worker count, and prints
+throughput, latency percentiles and status counts per count. Throughput
+should grow with workers up to the number of cores and then flatten;
+429s mean --max-pending is below --concurrency.
+
+    cd backend
+    DATABASE_URL=sqlite:////tmp/login.db python -m benchmarks.login_throughput
+    DATABASE_URL=sqlite:////tmp/login.db python -m benchmarks.login_throughput --workers 0,1,2,4 --rounds 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+PASSWORD = "Passw0rd!"
+
+
+def default_workers():
+    cores = os.cpu_count() or 1
+    counts, n = [], 1
+    while n < cores:
+        counts.append(n)
+        n *= 2
+    return counts + [cores]
+
+
+def setup() -> str:
+    import models
+    from auth import hash_password
+    from database import SessionLocal, engine
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        email = f"login{int(time.time() * 1000)}@example.com"
+        db.add(models.User(name="login", email=email, password=hash_password(PASSWORD), phone=email))
+        db.commit()
+        return email
+    finally:
+        db.close()
+
+
+def percentile(values, pct):
+    return statistics.quantiles(values, n=100)[pct - 1] if len(values) > 1 else values[0]
+
+
+async def fire(email: str, requests: int, concurrency: int):
+    import httpx
+
+    import main
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, status_counts = [], {}
+
+    transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                r = await client.post("/users/login", data={"username": email, "password": PASSWORD})
+                latencies.append(time.perf_counter() - started)
+                status_counts[r.status_code] = status_counts.get(r.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    return elapsed, latencies, status_counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", default=",".join(map(str, default_workers())),
+                        help="comma separated worker counts, 0 = hash inline")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="pool admission limit (default: --concurrency, i.e. no 429s)")
+    parser.add_argument("--rounds", type=int, default=None, help="bcrypt cost (default BCRYPT_ROUNDS)")
+    args = parser.parse_args()
+
+    if args.rounds is not None:
+        os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    # measure hashing, not the login rate limit
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    from database import DATABASE_URL
+    if DATABASE_URL == "sqlite://" or ":memory:" in DATABASE_URL:
+        sys.exit("use a file or server database: an in-memory SQLite DB is one shared connection")
+
+    from utils.passwords import BCRYPT_ROUNDS, password_hasher
+
+    email = setup()
+    results = []
+    for workers in (int(w) for w in args.workers.split(",")):
+        password_hasher.shutdown()
+        password_hasher.workers = workers
+        password_hasher.max_pending = args.max_pending or args.concurrency
+        # start the processes before timing
+        for _ in range(max(workers, 1)):
+            password_hasher.hash(PASSWORD)
+
+        elapsed, latencies, status_counts = asyncio.run(fire(email, args.requests, args.concurrency))
+        results.append({
+            "workers": workers,
+            "throughput_rps": round(args.requests / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "status_counts": status_counts,
+        })
+    password_hasher.shutdown()
+
+    print(json.dumps({
+        "cores": os.cpu_count(),
+        "bcrypt_rounds": BCRYPT_ROUNDS,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Query-plan regression check (Postgres only).
+
+Seeds a dataset, ANALYZEs it, then EXPLAINs the router query shapes and
+fails if any of them falls back to a sequential scan on a large table.
+
+    cd backend
+    alembic upgrade head
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.query_plans
+"""
+import argparse
+import json
+import sys
+
+from sqlalchemy import text
+
+# tables big enough that a seq scan means a missing/unused index
+LARGE_TABLES = {"transactions", "alerts", "accounts", "monthly_summaries"}
+
+# (name, sql) — mirrors the filters/orderings used by the routers
+QUERIES = [
+    ("transactions page (keyset)", """
+        SELECT t.* FROM transactions t JOIN accounts a ON a.id = t.account_id
+        WHERE a.user_id = :user_id
+          AND (t.txn_date, t.id) < (now(), 2147483647)
+        ORDER BY t.txn_date DESC, t.id DESC LIMIT 51
+    """),
+    ("transactions for account", """
+        SELECT * FROM transactions WHERE account_id = :account_id
+    """),
+    ("spending by category", """
+        SELECT t.category, sum(t.amount) FROM transactions t
+        JOIN accounts a ON a.id = t.account_id
+        WHERE a.user_id = :user_id AND t.txn_type = 'debit'
+        GROUP BY t.category
+    """),
+    ("top merchants", """
+        SELECT t.merchant, sum(t.amount) FROM transactions t
+        JOIN accounts a ON a.id = t.account_id
+        WHERE a.user_id = :user_id AND t.txn_type = 'debit'
+        GROUP BY t.merchant ORDER BY sum(t.amount) DESC LIMIT 5
+    """),
+    ("burn rate", """
+        SELECT sum(t.amount) FROM transactions t
+        JOIN accounts a ON a.id = t.account_id
+        WHERE a.user_id = :user_id AND t.txn_type = 'debit'
+          AND t.txn_date >= now() - interval '30 days'
+    """),
+    ("budget spend", """
+        SELECT t.category, sum(t.amount) FROM transactions t
+        JOIN accounts a ON a.id = t.account_id
+        WHERE a.user_id = :user_id AND t.txn_type = 'debit'
+          AND t.category IN ('Food', 'Travel')
+          AND t.txn_date >= date_trunc('month', now())
+          AND t.txn_date < date_trunc('month', now()) + interval '1 month'
+        GROUP BY t.category
+    """),
+    ("dashboard summary", """
+        SELECT category, sum(expenses), sum(income) FROM monthly_summaries
+        WHERE user_id = :user_id GROUP BY category
+    """),
+    ("unread alert count", """
+        SELECT count(id) FROM alerts WHERE user_id = :user_id AND is_read = false
+    """),
+    ("latest alerts", """
+        SELECT * FROM alerts WHERE user_id = :user_id
+        ORDER BY created_at DESC LIMIT 5
+    """),
+]
+
+
+def walk(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--txns", type=int, default=500, help="typical transactions per account")
+    args = parser.parse_args()
+
+    from database import engine, SessionLocal
+    from models import Account
+    from benchmarks.datagen import seed
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("query plan checks need Postgres (set DATABASE_URL)")
+
+    seed(args.users, args.txns)
+
+    db = SessionLocal()
+    try:
+        account = db.query(Account).order_by(Account.id.desc()).first()
+    finally:
+        db.close()
+
+    params = {"user_id": account.user_id, "account_id": account.id}
+    failures = []
+
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        for name, sql in QUERIES:
+            plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+
+            nodes = list(walk(plan[0]["Plan"]))
+            seq = [
+                n["Relation Name"] for n in nodes
+                if n["Node Type"] == "Seq Scan" and n.get("Relation Name") in LARGE_TABLES
+            ]
+            used = sorted({n["Index Name"] for n in nodes if "Index Name" in n})
+
+            status = "FAIL" if seq else "ok"
+            print(f"{status:4} {name:28} indexes={','.join(used) or '-'}"
+                  + (f" seqscan={','.join(seq)}" if seq else ""))
+            if seq:
+                failures.append(name)
+
+    if failures:
+        sys.exit(f"{len(failures)} query shape(s) fell back to sequential scans")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""
+End-to-end benchmark suite.
+
+Seeds the synthetic dataset (benchmarks/datagen.py), then drives the real
+app in-process through httpx's ASGI transport, one scenario at a time:
+
+    dashboard     GET /dashboard/summary then /transactions/?limit=5
+    insights      the four /insights/ calls of the Insights page, in parallel
+    csv-import    POST /transactions/upload-csv with --csv-rows rows
+    csv-export    GET /exports/transactions/csv, whole body
+    pdf-export    POST /exports/transactions/pdf, polled until rendered
+    txn-storm     POST /transactions/ against the accounts of 10% of users
+
+An operation is one page load, upload or export as above. Each scenario
+reports ops, throughput, p50/p95/p99 latency and SQL statements / DB time
+per operation (from the Server-Timing header, see utils/metrics.py) as
+JSON. Streamed responses (csv-export) only count the statements that ran
+before the first byte. Save a run with --output and pass it as --compare
+to a later one to fail (exit 1) when p95, throughput or queries per op
+regress by more than --tolerance.
+
+    cd backend
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --scenarios dashboard,insights --compare before.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.datagen import SPEND, SYNTH_EMAIL_LIKE, use_database, zipf_choice
+
+SERVER_TIMING_DB = re.compile(r'db;dur=(?P<dur>[\d.]+);desc="(?P<queries>\d+) queries"')
+PDF_POLL_INTERVAL = 0.05
+PDF_TIMEOUT = 120
+
+
+# ================= SCENARIOS =================
+# async op(client, user, i, args) -> list of httpx responses; raising
+# (or any response >= 400) counts the operation as an error
+
+
+class OperationFailed(Exception):
+    pass
+
+
+async def dashboard(client, user, i, args):
+    return [
+        await client.get("/dashboard/summary", headers=user["headers"]),
+        await client.get("/transactions/", params={"limit": 5}, headers=user["headers"]),
+    ]
+
+
+async def insights(client, user, i, args):
+    return list(await asyncio.gather(*(
+        client.get(path, headers=user["headers"])
+        for path in (
+            "/insights/monthly-cashflow",
+            "/insights/spending-by-category",
+            "/insights/top-merchants",
+            "/insights/burn-rate",
+        )
+    )))
+
+
+def synth_csv(rng, rows: int) -> bytes:
+    out = io.StringIO()
+    out.write("amount,txn_type,merchant,description,txn_date\n")
+    now = datetime.utcnow()
+    for _ in range(rows):
+        category = rng.choice(list(SPEND))
+        merchants, typical = SPEND[category]
+        when = now - timedelta(days=rng.randrange(60), minutes=rng.randrange(1440))
+        out.write(
+            f"{round(rng.lognormvariate(0, 0.6) * typical, 2)},debit,"
+            f"{zipf_choice(rng, merchants)},imported,{when.isoformat(timespec='seconds')}\n"
+        )
+    return out.getvalue().encode()
+
+
+async def csv_import(client, user, i, args):
+    body = synth_csv(random.Random(i), args.csv_rows)
+    return [await client.post(
+        "/transactions/upload-csv",
+        files={"file": ("bench.csv", body, "text/csv")},
+        headers=user["headers"]
+    )]
+
+
+async def csv_export(client, user, i, args):
+    return [await client.get("/exports/transactions/csv", headers=user["headers"])]
+
+
+async def pdf_export(client, user, i, args):
+    # a distinct date_to per op, so every op renders instead of hitting the cache
+    date_to = (datetime.now(timezone.utc) + timedelta(days=1, seconds=i)).replace(tzinfo=None)
+    submitted = await client.post(
+        "/exports/transactions/pdf",
+        params={"date_to": date_to.isoformat()},
+        headers=user["headers"]
+    )
+    responses = [submitted]
+    if submitted.status_code != 200:
+        return responses
+
+    job_id = submitted.json()["job_id"]
+    deadline = time.perf_counter() + PDF_TIMEOUT
+    status = submitted.json()["status"]
+    while status not in ("done", "failed") and time.perf_counter() < deadline:
+        await asyncio.sleep(PDF_POLL_INTERVAL)
+        poll = await client.get(f"/exports/jobs/{job_id}", headers=user["headers"])
+        responses.append(poll)
+        status = poll.json().get("status") if poll.status_code == 200 else "failed"
+    if status != "done":
+        raise OperationFailed(f"pdf job {job_id} ended as {status}")
+    return responses
+
+
+async def txn_storm(client, user, i, args):
+    rng = random.Random(i)
+    merchant = zipf_choice(rng, SPEND["Food"][0])
+    return [await client.post("/transactions/", headers=user["headers"], json={
+        "account_id": rng.choice(user["account_ids"]),
+        "amount": str(round(rng.lognormvariate(6, 0.8), 2)),
+        "txn_type": "debit" if rng.random() < 0.8 else "credit",
+        "merchant": merchant,
+        "description": "storm",
+    })]
+
+
+# name -> (op, share of users it runs against)
+SCENARIOS = {
+    "dashboard": (dashboard, 1.0),
+    "insights": (insights, 1.0),
+    "csv-import": (csv_import, 1.0),
+    "csv-export": (csv_export, 1.0),
+    "pdf-export": (pdf_export, 1.0),
+    "txn-storm": (txn_storm, 0.1),      # hot accounts, so writes contend
+}
+
+
+# ================= RUNNER =================
+
+def server_timing(response):
+    """(statements, db ms) reported by TimingMiddleware."""
+    match = SERVER_TIMING_DB.search(response.headers.get("server-timing", ""))
+    return (int(match["queries"]), float(match["dur"])) if match else (0, 0.0)
+
+
+def percentile(values, pct):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def load_users():
+    from sqlalchemy import select
+
+    from auth import create_access_token
+    from database import SessionLocal
+    from models import Account, User
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(User.id, Account.id)
+            .join(Account, Account.user_id == User.id)
+            .where(User.email.like(SYNTH_EMAIL_LIKE))
+            .order_by(User.id, Account.id)
+        ).all()
+    finally:
+        db.close()
+
+    users = {}
+    for user_id, account_id in rows:
+        user = users.setdefault(user_id, {
+            "id": user_id,
+            "headers": {"Authorization": f"Bearer {create_access_token(user_id)}"},
+            "account_ids": [],
+        })
+        user["account_ids"].append(account_id)
+    return list(users.values())
+
+
+async def run_scenario(client, name, users, args):
+    op, share = SCENARIOS[name]
+    users = users[:max(1, int(len(users) * share))]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    samples = []
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                responses, failed = await op(client, users[i % len(users)], i, args), False
+            except Exception as exc:
+                print(f"{name}: {exc!r}", file=sys.stderr)
+                responses, failed = [], True
+            samples.append((time.perf_counter() - started, responses, failed))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(seconds for seconds, _, _ in samples)
+    status_counts, statements, db_ms, errors = {}, [], [], 0
+    for _, responses, failed in samples:
+        timings = [server_timing(r) for r in responses]
+        statements.append(sum(q for q, _ in timings))
+        db_ms.append(sum(d for _, d in timings))
+        for r in responses:
+            status_counts[str(r.status_code)] = status_counts.get(str(r.status_code), 0) + 1
+        errors += failed or any(r.status_code >= 400 for r in responses)
+
+    return {
+        "scenario": name,
+        "ops": len(samples),
+        "http_requests": sum(status_counts.values()),
+        "errors": errors,
+        "status_counts": status_counts,
+        "throughput_ops": round(len(samples) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "queries_per_op": round(statistics.mean(statements), 2),
+        "max_queries_per_op": max(statements),
+        "db_ms_per_op": round(statistics.mean(db_ms), 2),
+    }
+
+
+async def run(names, users, args):
+    import httpx
+
+    import main
+
+    transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        results = []
+        for name in names:
+            results.append(await run_scenario(client, name, users, args))
+            print(f"{name:12} done", file=sys.stderr)
+        return results
+
+
+def compare(results, baseline_path, tolerance):
+    """Regressions against an earlier --output file: p95, throughput or queries per op."""
+    with open(baseline_path) as f:
+        baseline = {s["scenario"]: s for s in json.load(f)["scenarios"]}
+
+    regressions = []
+    for current in results:
+        before = baseline.get(current["scenario"])
+        if not before:
+            continue
+        if current["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{current['scenario']}: p95 {before['p95_ms']} -> {current['p95_ms']} ms")
+        if current["throughput_ops"] < before["throughput_ops"] * (1 - tolerance):
+            regressions.append(
+                f"{current['scenario']}: throughput {before['throughput_ops']} -> {current['throughput_ops']} ops/s"
+            )
+        if current["queries_per_op"] > before["queries_per_op"] * (1 + tolerance):
+            regressions.append(
+                f"{current['scenario']}: queries/op {before['queries_per_op']} -> {current['queries_per_op']}"
+            )
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma separated, from: {', '.join(SCENARIOS)}")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--txns", type=int, default=200, help="typical transactions per account")
+    parser.add_argument("--requests", type=int, default=200, help="operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--csv-rows", type=int, default=500, help="rows per csv-import upload")
+    parser.add_argument("--output", help="also write the JSON report here")
+    parser.add_argument("--compare", help="earlier report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95/throughput drift")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    use_database()
+    # measure the app, not the rate limiter
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    from benchmarks.datagen import seed
+    from database import engine
+    from utils.pdf_jobs import EXPORT_DIR
+
+    rows = seed(args.users, args.txns)
+    users = load_users()
+    results = asyncio.run(run(names, users, args))
+
+    # rendered benchmark statements are throwaway
+    for user in users:
+        shutil.rmtree(os.path.join(EXPORT_DIR, str(user["id"])), ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "database": engine.dialect.name,
+            "database_url": engine.url.render_as_string(hide_password=True),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "rows": rows,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "csv_rows": args.csv_rows,
+        },
+        "scenarios": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
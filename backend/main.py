@@ -1,19 +1,80 @@
+import asyncio
+import functools
+import os
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine
+from database import engine, pool_stats
 import models
+from utils.partitions import TXN_PARTITION_INTERVAL, ensure_transaction_partitions
+from utils.alert_rules import ALERT_EVAL_INTERVAL, evaluate_alert_rules
+from utils.ledger import LEDGER_COMPACT_INTERVAL, compact
+from utils.idempotency import IDEMPOTENCY_PURGE_INTERVAL, purge_expired_keys
+from utils.periodic import run_periodically
+from utils.passwords import password_hasher
+from utils.pdf_jobs import shutdown_pdf_pool
+from utils.rate_limit import RateLimitMiddleware
+from utils.metrics import TimingMiddleware, render_metrics
 from routers import users, accounts,alerts, transactions, exports,insights,categorize,budgets,bills,dashboard,rewards
 from routers import tickets
 from fastapi.staticfiles import StaticFiles
 
 
-models.Base.metadata.create_all(bind=engine)
+# Schema is managed by Alembic (alembic upgrade head).
+# DB_CREATE_ALL=true keeps the old create_all behaviour for throwaway local DBs.
+if os.getenv("DB_CREATE_ALL", "false").lower() == "true":
+    models.Base.metadata.create_all(bind=engine)
 
 app = FastAPI(title="Modern Digital Banking Dashboard")
 
+
+@app.on_event("startup")
+async def start_background_jobs():
+    # interval 0 disables a job, e.g. when a separate worker runs it
+    jobs = [
+        # partitions for the coming months, a no-op unless transactions is
+        # partitioned (Postgres, migration 0003), see utils/partitions.py
+        ("transaction partitions", functools.partial(ensure_transaction_partitions, engine), TXN_PARTITION_INTERVAL),
+        # bill_due / budget_exceeded / low_balance alerts, see utils/alert_rules.py
+        ("alert rules", evaluate_alert_rules, ALERT_EVAL_INTERVAL),
+        # fold ledger entries into account balance snapshots, see utils/ledger.py
+        ("ledger compaction", compact, LEDGER_COMPACT_INTERVAL),
+        # drop Idempotency-Key records past their TTL, see utils/idempotency.py
+        ("idempotency key purge", purge_expired_keys, IDEMPOTENCY_PURGE_INTERVAL),
+    ]
+    app.state.background_jobs = [
+        asyncio.create_task(run_periodically(name, func, interval))
+        for name, func, interval in jobs
+        if interval > 0
+    ]
+
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    for task in getattr(app.state, "background_jobs", []):
+        task.cancel()
+
+
+@app.on_event("shutdown")
+def stop_password_pool():
+    password_hasher.shutdown()
+
+
+@app.on_event("shutdown")
+def stop_pdf_pool():
+    shutdown_pdf_pool()
+
+
+CORS_ORIGINS = ["http://localhost:8080"]
+
+# per-client token buckets, budgets in utils/rate_limit.py
+app.add_middleware(RateLimitMiddleware)
+# latency / SQL metrics and Server-Timing, see utils/metrics.py (sees 429s too)
+app.add_middleware(TimingMiddleware, timing_allow_origin=", ".join(CORS_ORIGINS))
+# added last = outermost, so 429s get CORS headers too
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:8080"],
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -39,4 +100,15 @@ app.include_router(dashboard.router)
 
 @app.get("/")
 def root():
-    return {"message": "Backend running"}
\ No newline at end of file
+    return {"message": "Backend running"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health/db-pool")
+def db_pool_health():
+    return pool_stats()
@@ -0,0 +1,146 @@
+"""initial schema
+
+Tables as previously created by Base.metadata.create_all in main.py.
+Existing databases should be stamped at this revision, not upgraded to it.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password", sa.String(), nullable=False),
+        sa.Column("phone", sa.String(), nullable=True, unique=True),
+        sa.Column("two_factor_enabled", sa.Boolean(), nullable=True),
+        sa.Column("profile_image", sa.String(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "categories",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("keywords", sa.String(), nullable=True),
+    )
+    op.create_index("ix_categories_id", "categories", ["id"])
+    op.create_index("ix_categories_name", "categories", ["name"], unique=True)
+
+    op.create_table(
+        "accounts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("bank_name", sa.String(), nullable=False),
+        sa.Column("account_type", sa.String(), nullable=False),
+        sa.Column("balance", sa.Float(), nullable=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_index("ix_accounts_id", "accounts", ["id"])
+
+    op.create_table(
+        "transactions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("account_id", sa.Integer(), sa.ForeignKey("accounts.id"), nullable=False),
+        sa.Column("description", sa.String(length=255), nullable=True),
+        sa.Column("merchant", sa.String(length=150), nullable=True),
+        sa.Column("category", sa.String(length=100), nullable=True),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("currency", sa.String(length=3), nullable=True),
+        sa.Column("txn_type", sa.String(length=20), nullable=False),
+        sa.Column("txn_date", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_transactions_id", "transactions", ["id"])
+
+    op.create_table(
+        "monthly_summaries",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("category", sa.String(length=100), nullable=False),
+        sa.Column("income", sa.Float(), nullable=False),
+        sa.Column("expenses", sa.Float(), nullable=False),
+        sa.Column("txn_count", sa.Integer(), nullable=False),
+        sa.UniqueConstraint("user_id", "month", "category"),
+    )
+    op.create_index("ix_monthly_summaries_id", "monthly_summaries", ["id"])
+
+    op.create_table(
+        "budgets",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("month", sa.Integer(), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("limit_amount", sa.Float(), nullable=False),
+        sa.Column("spent_amount", sa.Float(), nullable=True),
+    )
+    op.create_index("ix_budgets_id", "budgets", ["id"])
+
+    op.create_table(
+        "bills",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("biller_name", sa.String(length=150), nullable=False),
+        sa.Column("due_date", sa.Date(), nullable=False),
+        sa.Column("amount_due", sa.Float(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=True),
+        sa.Column("auto_pay", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_bills_id", "bills", ["id"])
+
+    op.create_table(
+        "rewards",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("program_name", sa.String(), nullable=False),
+        sa.Column("points_balance", sa.Integer(), nullable=True),
+        sa.Column("last_updated", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_rewards_id", "rewards", ["id"])
+
+    op.create_table(
+        "alerts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("alert_type", sa.String(length=50), nullable=False),
+        sa.Column("title", sa.String(length=150), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("is_read", sa.Boolean(), nullable=True),
+        sa.Column("severity", sa.String(length=20), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_alerts_id", "alerts", ["id"])
+
+    op.create_table(
+        "tickets",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("subject", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column("category", sa.String(length=100), nullable=False),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_tickets_id", "tickets", ["id"])
+
+
+def downgrade():
+    for table in (
+        "tickets", "alerts", "rewards", "bills", "budgets",
+        "monthly_summaries", "transactions", "accounts", "categories", "users",
+    ):
+        op.drop_table(table)
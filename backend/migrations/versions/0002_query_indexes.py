@@ -0,0 +1,66 @@
+"""indexes matching the routers' filters and sort orders
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+DEBIT_ONLY = sa.text("txn_type = 'debit'")
+
+
+def upgrade():
+    # every per-user query joins accounts on user_id
+    op.create_index("ix_accounts_user_id", "accounts", ["user_id"])
+
+    # account history, keyset pagination (txn_date, id), date ranges
+    op.create_index(
+        "ix_transactions_account_date",
+        "transactions", ["account_id", "txn_date", "id"]
+    )
+    # budget progress: category spend per month
+    op.create_index(
+        "ix_transactions_category_type_date",
+        "transactions", ["category", "txn_type", "txn_date"]
+    )
+    # insights / burn rate / top merchants read debits only;
+    # INCLUDE makes them index-only scans on Postgres
+    op.create_index(
+        "ix_transactions_debits",
+        "transactions", ["account_id", "txn_date"],
+        postgresql_include=["amount", "category", "merchant"],
+        postgresql_where=DEBIT_ONLY,
+        sqlite_where=DEBIT_ONLY,
+    )
+
+    # alert list filtered by read state, bell dropdown / unread count
+    op.create_index(
+        "ix_alerts_user_read_created",
+        "alerts", ["user_id", "is_read", "created_at"]
+    )
+    op.create_index("ix_alerts_user_created", "alerts", ["user_id", "created_at"])
+
+    op.create_index("ix_budgets_user_period", "budgets", ["user_id", "year", "month"])
+    op.create_index("ix_bills_user_due", "bills", ["user_id", "due_date"])
+    op.create_index("ix_rewards_user_program", "rewards", ["user_id", "program_name"])
+    op.create_index("ix_tickets_user_created", "tickets", ["user_id", "created_at"])
+
+
+def downgrade():
+    op.drop_index("ix_tickets_user_created", "tickets")
+    op.drop_index("ix_rewards_user_program", "rewards")
+    op.drop_index("ix_bills_user_due", "bills")
+    op.drop_index("ix_budgets_user_period", "budgets")
+    op.drop_index("ix_alerts_user_created", "alerts")
+    op.drop_index("ix_alerts_user_read_created", "alerts")
+    op.drop_index("ix_transactions_debits", "transactions")
+    op.drop_index("ix_transactions_category_type_date", "transactions")
+    op.drop_index("ix_transactions_account_date", "transactions")
+    op.drop_index("ix_accounts_user_id", "accounts")
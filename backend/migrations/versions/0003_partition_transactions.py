@@ -0,0 +1,141 @@
+"""partition transactions by month on txn_date
+
+On Postgres the table is rebuilt as PARTITION BY RANGE (txn_date) with
+one partition per month plus a default partition. The primary key becomes
+(id, txn_date) because it must contain the partition key; ids still come
+from the same sequence. On other databases only txn_date becomes NOT NULL.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.dates import add_months
+from utils.partitions import create_month_partitions, TXN_PARTITIONS_AHEAD
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    "id, account_id, description, merchant, category, "
+    "amount, currency, txn_type, txn_date"
+)
+INDEXES = (
+    "ix_transactions_id",
+    "ix_transactions_account_date",
+    "ix_transactions_category_type_date",
+    "ix_transactions_debits",
+)
+
+
+def create_indexes():
+    op.create_index("ix_transactions_id", "transactions", ["id"])
+    op.create_index(
+        "ix_transactions_account_date",
+        "transactions", ["account_id", "txn_date", "id"]
+    )
+    op.create_index(
+        "ix_transactions_category_type_date",
+        "transactions", ["category", "txn_type", "txn_date"]
+    )
+    op.create_index(
+        "ix_transactions_debits",
+        "transactions", ["account_id", "txn_date"],
+        postgresql_include=["amount", "category", "merchant"],
+        postgresql_where=sa.text("txn_type = 'debit'"),
+    )
+
+
+def upgrade():
+    conn = op.get_bind()
+
+    if conn.dialect.name != "postgresql":
+        # same backfill as the Postgres copy below
+        op.execute("UPDATE transactions SET txn_date = CURRENT_TIMESTAMP WHERE txn_date IS NULL")
+        with op.batch_alter_table("transactions") as batch_op:
+            batch_op.alter_column("txn_date", existing_type=sa.DateTime(), nullable=False)
+        return
+
+    for name in INDEXES:
+        op.drop_index(name, "transactions")
+    op.execute("ALTER TABLE transactions RENAME TO transactions_legacy")
+    op.execute("ALTER SEQUENCE transactions_id_seq OWNED BY NONE")
+
+    op.execute("""
+        CREATE TABLE transactions (
+            id integer NOT NULL DEFAULT nextval('transactions_id_seq'),
+            account_id integer NOT NULL REFERENCES accounts (id),
+            description varchar(255),
+            merchant varchar(150),
+            category varchar(100),
+            amount double precision NOT NULL,
+            currency varchar(3),
+            txn_type varchar(20) NOT NULL,
+            txn_date timestamp without time zone NOT NULL,
+            PRIMARY KEY (id, txn_date)
+        ) PARTITION BY RANGE (txn_date)
+    """)
+    op.execute("ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id")
+    op.execute("CREATE TABLE transactions_default PARTITION OF transactions DEFAULT")
+
+    # partitions for all existing history plus the next few months
+    oldest = conn.execute(sa.text("SELECT min(txn_date) FROM transactions_legacy")).scalar()
+    this_month = date.today().replace(day=1)
+    first = date(oldest.year, oldest.month, 1) if oldest else this_month
+    create_month_partitions(conn, first, add_months(this_month, TXN_PARTITIONS_AHEAD))
+
+    op.execute(f"""
+        INSERT INTO transactions ({COLUMNS})
+        SELECT id, account_id, description, merchant, category,
+               amount, currency, txn_type, COALESCE(txn_date, now())
+        FROM transactions_legacy
+    """)
+    op.execute("DROP TABLE transactions_legacy")
+
+    create_indexes()
+
+
+def downgrade():
+    conn = op.get_bind()
+
+    if conn.dialect.name != "postgresql":
+        # same backfill as the Postgres copy below
+        op.execute("UPDATE transactions SET txn_date = CURRENT_TIMESTAMP WHERE txn_date IS NULL")
+        with op.batch_alter_table("transactions") as batch_op:
+            batch_op.alter_column("txn_date", existing_type=sa.DateTime(), nullable=True)
+        return
+
+    op.execute("ALTER TABLE transactions RENAME TO transactions_partitioned")
+    op.execute("ALTER SEQUENCE transactions_id_seq OWNED BY NONE")
+    for name in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    op.execute("""
+        CREATE TABLE transactions (
+            id integer PRIMARY KEY DEFAULT nextval('transactions_id_seq'),
+            account_id integer NOT NULL REFERENCES accounts (id),
+            description varchar(255),
+            merchant varchar(150),
+            category varchar(100),
+            amount double precision NOT NULL,
+            currency varchar(3),
+            txn_type varchar(20) NOT NULL,
+            txn_date timestamp without time zone
+        )
+    """)
+    op.execute("ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id")
+    op.execute(f"""
+        INSERT INTO transactions ({COLUMNS})
+        SELECT {COLUMNS} FROM transactions_partitioned
+    """)
+    # dropping the parent drops every partition with it
+    op.execute("DROP TABLE transactions_partitioned")
+
+    create_indexes()
@@ -0,0 +1,57 @@
+"""alerts.dedup_key with a unique (user_id, dedup_key) constraint
+
+Existing alerts are backfilled and any duplicates already in the table
+(same user, type and message) are removed, keeping the oldest one.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from utils.alert_helper import dedup_key
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    op.add_column("alerts", sa.Column("dedup_key", sa.String(32), nullable=True))
+
+    if conn.dialect.name == "postgresql":
+        op.execute("UPDATE alerts SET dedup_key = md5(alert_type || '|' || message)")
+    else:
+        alerts = sa.table(
+            "alerts",
+            sa.column("id", sa.Integer),
+            sa.column("alert_type", sa.String),
+            sa.column("message", sa.Text),
+            sa.column("dedup_key", sa.String),
+        )
+        rows = conn.execute(sa.select(alerts.c.id, alerts.c.alert_type, alerts.c.message)).all()
+        if rows:
+            conn.execute(
+                alerts.update().where(alerts.c.id == sa.bindparam("row_id")),
+                [{"row_id": r.id, "dedup_key": dedup_key(r.alert_type, r.message)} for r in rows]
+            )
+
+    op.execute("""
+        DELETE FROM alerts WHERE id NOT IN (
+            SELECT min(id) FROM alerts GROUP BY user_id, dedup_key
+        )
+    """)
+
+    with op.batch_alter_table("alerts") as batch_op:
+        batch_op.alter_column("dedup_key", existing_type=sa.String(32), nullable=False)
+        batch_op.create_unique_constraint("uq_alerts_user_dedup", ["user_id", "dedup_key"])
+
+
+def downgrade():
+    with op.batch_alter_table("alerts") as batch_op:
+        batch_op.drop_constraint("uq_alerts_user_dedup", type_="unique")
+        batch_op.drop_column("dedup_key")
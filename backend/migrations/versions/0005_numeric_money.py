@@ -0,0 +1,67 @@
+"""money columns to NUMERIC(14, 2), one rewards row per (user, program)
+
+Balance and points updates are now atomic SQL increments, which needs
+exact arithmetic and a unique (user_id, program_name) to upsert on.
+Duplicate reward rows are merged into the oldest one first.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+MONEY_COLUMNS = {
+    "accounts": [("balance", True)],
+    "transactions": [("amount", False)],
+    "monthly_summaries": [("income", False), ("expenses", False)],
+    "budgets": [("limit_amount", False), ("spent_amount", True)],
+    "bills": [("amount_due", False)],
+}
+
+
+def alter_money(from_type, to_type, using):
+    for table, columns in MONEY_COLUMNS.items():
+        with op.batch_alter_table(table) as batch_op:
+            for name, nullable in columns:
+                batch_op.alter_column(
+                    name,
+                    existing_type=from_type,
+                    type_=to_type,
+                    existing_nullable=nullable,
+                    postgresql_using=using.format(name=name),
+                )
+
+
+def upgrade():
+    alter_money(sa.Float(), sa.Numeric(14, 2), "round({name}::numeric, 2)")
+
+    op.execute("""
+        UPDATE rewards SET points_balance = (
+            SELECT sum(coalesce(r.points_balance, 0)) FROM rewards r
+            WHERE r.user_id = rewards.user_id AND r.program_name = rewards.program_name
+        )
+        WHERE id IN (
+            SELECT min(id) FROM rewards GROUP BY user_id, program_name HAVING count(*) > 1
+        )
+    """)
+    op.execute("""
+        DELETE FROM rewards WHERE id NOT IN (
+            SELECT min(id) FROM rewards GROUP BY user_id, program_name
+        )
+    """)
+    op.drop_index("ix_rewards_user_program", "rewards")
+    op.create_index("ix_rewards_user_program", "rewards", ["user_id", "program_name"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ix_rewards_user_program", "rewards")
+    op.create_index("ix_rewards_user_program", "rewards", ["user_id", "program_name"])
+
+    alter_money(sa.Numeric(14, 2), sa.Float(), "{name}::double precision")
@@ -0,0 +1,83 @@
+"""append-only ledger_entries; accounts.balance becomes a snapshot
+
+Backfill keeps every current balance exactly: each account gets an
+"opening" entry for whatever its balance does not explain through its
+transactions, then one entry per transaction, and the snapshot is set
+to cover all of them.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+SIGNED_AMOUNT = "CASE WHEN t.txn_type = 'credit' THEN t.amount ELSE -t.amount END"
+
+
+def upgrade():
+    op.create_table(
+        "ledger_entries",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), primary_key=True),
+        sa.Column(
+            "account_id", sa.Integer(),
+            sa.ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("amount", sa.Numeric(14, 2), nullable=False),
+        sa.Column("kind", sa.String(length=20), nullable=False),
+        sa.Column("txn_id", sa.Integer(), nullable=True),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True),
+            nullable=False, server_default=sa.func.now()
+        ),
+    )
+    op.create_index("ix_ledger_entries_account_id", "ledger_entries", ["account_id", "id"])
+
+    with op.batch_alter_table("accounts") as batch_op:
+        batch_op.add_column(
+            sa.Column("ledger_entry_id", sa.BigInteger(), nullable=False, server_default="0")
+        )
+
+    op.execute(f"""
+        INSERT INTO ledger_entries (account_id, amount, kind)
+        SELECT a.id,
+               coalesce(a.balance, 0) - coalesce(
+                   (SELECT sum({SIGNED_AMOUNT}) FROM transactions t WHERE t.account_id = a.id), 0
+               ),
+               'opening'
+        FROM accounts a
+        ORDER BY a.id
+    """)
+    op.execute(f"""
+        INSERT INTO ledger_entries (account_id, amount, kind, txn_id)
+        SELECT t.account_id, {SIGNED_AMOUNT}, 'transaction', t.id
+        FROM transactions t
+        ORDER BY t.id
+    """)
+    op.execute("""
+        UPDATE accounts SET
+            balance = coalesce(balance, 0),
+            ledger_entry_id = coalesce(
+                (SELECT max(e.id) FROM ledger_entries e WHERE e.account_id = accounts.id), 0
+            )
+    """)
+
+
+def downgrade():
+    # fold everything back into the balance column first
+    op.execute("""
+        UPDATE accounts SET balance = coalesce(
+            (SELECT sum(e.amount) FROM ledger_entries e WHERE e.account_id = accounts.id), 0
+        )
+    """)
+    with op.batch_alter_table("accounts") as batch_op:
+        batch_op.drop_column("ledger_entry_id")
+
+    op.drop_index("ix_ledger_entries_account_id", "ledger_entries")
+    op.drop_table("ledger_entries")
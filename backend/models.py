@@ -1,12 +1,16 @@
 from sqlalchemy import (
-    Column, Integer, String, Boolean, Float,
-    ForeignKey, Numeric, DateTime, Date, Text
+    Column, Integer, BigInteger, String, Boolean,
+    ForeignKey, Numeric, DateTime, Date, Text, UniqueConstraint, Index,
+    text
 )
 from sqlalchemy.orm import relationship
 from database import Base
 from sqlalchemy.sql import func
 from datetime import datetime
 
+# money is exact: never Float
+Money = Numeric(14, 2)
+
 
 # =========================
 # USER
@@ -26,6 +30,7 @@ class User(Base):
     budgets = relationship("Budget", back_populates="user", cascade="all, delete")
     bills = relationship("Bill", back_populates="user", cascade="all, delete")
     alerts = relationship("Alert", back_populates="user", cascade="all, delete")
+    monthly_summaries = relationship("MonthlySummary", cascade="all, delete")
 
 
 # =========================
@@ -33,11 +38,18 @@ class User(Base):
 # =========================
 class Account(Base):
     __tablename__ = "accounts"
+    __table_args__ = (
+        Index("ix_accounts_user_id", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     bank_name = Column(String, nullable=False)
     account_type = Column(String, nullable=False)
-    balance = Column(Float, default=0.0)
+
+    # snapshot: sum of ledger entries up to ledger_entry_id.
+    # The live balance adds the entries after it, see utils/ledger.py
+    balance = Column(Money, default=0)
+    ledger_entry_id = Column(BigInteger, nullable=False, default=0, server_default="0")
 
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     user = relationship("User", back_populates="accounts")
@@ -55,6 +67,20 @@ class Account(Base):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # per-account history, keyset pagination, date-range filters
+        Index("ix_transactions_account_date", "account_id", "txn_date", "id"),
+        # budgets: category spend per month
+        Index("ix_transactions_category_type_date", "category", "txn_type", "txn_date"),
+        # insights / burn rate only ever read debits
+        Index(
+            "ix_transactions_debits",
+            "account_id", "txn_date",
+            postgresql_include=["amount", "category", "merchant"],
+            postgresql_where=text("txn_type = 'debit'"),
+            sqlite_where=text("txn_type = 'debit'"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
@@ -63,14 +89,78 @@ class Transaction(Base):
     merchant = Column(String(150))
     category = Column(String(100))
 
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     currency = Column(String(3), default="INR")
     txn_type = Column(String(20), nullable=False)
-    txn_date = Column(DateTime, default=datetime.utcnow)
+    # partition key on Postgres (monthly ranges, see utils/partitions.py);
+    # filter it with half-open ranges so partitions get pruned
+    txn_date = Column(DateTime, nullable=False, default=datetime.utcnow)
 
     account = relationship("Account", back_populates="transactions")
 
 
+# =========================
+# LEDGER (append only, never updated or deleted on its own)
+# =========================
+class LedgerEntry(Base):
+    __tablename__ = "ledger_entries"
+    __table_args__ = (
+        Index("ix_ledger_entries_account_id", "account_id", "id"),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    account_id = Column(
+        Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False
+    )
+    amount = Column(Money, nullable=False)              # signed: credits > 0
+    kind = Column(String(20), nullable=False)           # opening | transaction
+    txn_id = Column(Integer)                            # transactions.id when kind = transaction
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+# =========================
+# IDEMPOTENCY KEYS (see utils/idempotency.py)
+# =========================
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_user_key"),
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)
+    fingerprint = Column(String(64), nullable=False)    # sha256 of path + arguments
+
+    # NULL until the original request has committed
+    status_code = Column(Integer)
+    response = Column(Text)
+
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+
+# =========================
+# MONTHLY SUMMARY (maintained on every transaction write)
+# =========================
+class MonthlySummary(Base):
+    __tablename__ = "monthly_summaries"
+    __table_args__ = (
+        UniqueConstraint("user_id", "month", "category"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    month = Column(Date, nullable=False)          # first day of month
+    category = Column(String(100), nullable=False)
+
+    income = Column(Money, nullable=False, default=0)
+    expenses = Column(Money, nullable=False, default=0)
+    txn_count = Column(Integer, nullable=False, default=0)
+
+
 # =========================
 # CATEGORY
 # =========================
@@ -87,6 +177,9 @@ class Category(Base):
 # =========================
 class Budget(Base):
     __tablename__ = "budgets"
+    __table_args__ = (
+        Index("ix_budgets_user_period", "user_id", "year", "month"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -95,8 +188,8 @@ class Budget(Base):
     year = Column(Integer, nullable=False)
     category = Column(String, nullable=False)
 
-    limit_amount = Column(Float, nullable=False)
-    spent_amount = Column(Float, default=0.0)
+    limit_amount = Column(Money, nullable=False)
+    spent_amount = Column(Money, default=0)
 
     user = relationship("User", back_populates="budgets")
 
@@ -106,13 +199,16 @@ class Budget(Base):
 # =========================
 class Bill(Base):
     __tablename__ = "bills"
+    __table_args__ = (
+        Index("ix_bills_user_due", "user_id", "due_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
     biller_name = Column(String(150), nullable=False)
     due_date = Column(Date, nullable=False)
-    amount_due = Column(Float, nullable=False)
+    amount_due = Column(Money, nullable=False)
 
     status = Column(String(20), default="upcoming")
     auto_pay = Column(Boolean, default=False)
@@ -127,6 +223,9 @@ class Bill(Base):
 # =========================
 class Reward(Base):
     __tablename__ = "rewards"
+    __table_args__ = (
+        Index("ix_rewards_user_program", "user_id", "program_name", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -148,6 +247,11 @@ class Reward(Base):
 # =========================
 class Alert(Base):
     __tablename__ = "alerts"
+    __table_args__ = (
+        Index("ix_alerts_user_read_created", "user_id", "is_read", "created_at"),
+        Index("ix_alerts_user_created", "user_id", "created_at"),
+        UniqueConstraint("user_id", "dedup_key", name="uq_alerts_user_dedup"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -160,6 +264,9 @@ class Alert(Base):
     severity = Column(String(20), default="warning")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # md5 of alert_type|message, see utils.alert_helper.dedup_key
+    dedup_key = Column(String(32), nullable=False)
+
     user = relationship("User", back_populates="alerts")
 
 
@@ -168,6 +275,9 @@ class Alert(Base):
 # =========================
 class Ticket(Base):
     __tablename__ = "tickets"
+    __table_args__ = (
+        Index("ix_tickets_user_created", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
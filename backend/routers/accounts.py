@@ -1,9 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from models import User, Account
+from sqlalchemy import select, delete
+from models import User, Account, Transaction, LedgerEntry
 from database import get_db
 from auth import get_current_user
 from schemas import AccountCreate, AccountResponse
+from utils.aggregates import record_transactions
+from utils.response_cache import bump_user_version
+from utils.ledger import open_account, live_balance_expr
 
 router = APIRouter(tags=["Accounts"])
 
@@ -12,8 +16,15 @@ def get_accounts(
     db: Session = Depends(get_db),
     current_user:User = Depends(get_current_user)
 ):
-    return db.query(Account).filter(
-        Account.user_id == current_user.id
+    return db.execute(
+        select(
+            Account.id,
+            Account.bank_name,
+            Account.account_type,
+            live_balance_expr().label("balance")
+        )
+        .where(Account.user_id == current_user.id)
+        .order_by(Account.id)
     ).all()
 
 
@@ -30,10 +41,9 @@ def create_account(
     new_account = Account(
         bank_name=account.bank_name,
         account_type=account.account_type,
-        balance=account.balance,
         user_id=current_user.id
     )
-    db.add(new_account)
+    open_account(db, new_account, account.balance)
     db.commit()
     db.refresh(new_account)
     return new_account
@@ -52,6 +62,23 @@ def delete_account(
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
 
+    # take the account's transactions out of the monthly summaries
+    record_transactions(
+        db,
+        current_user.id,
+        db.query(
+            Transaction.txn_date,
+            Transaction.category,
+            Transaction.txn_type,
+            Transaction.amount
+        )
+        .filter(Transaction.account_id == account.id)
+        .execution_options(yield_per=5000),
+        sign=-1
+    )
+
+    db.execute(delete(LedgerEntry).where(LedgerEntry.account_id == account.id))
     db.delete(account)
     db.commit()
+    bump_user_version(current_user.id)
     return {"message": "Account deleted"}
\ No newline at end of file
@@ -1,11 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy import select, func
 
-from database import get_db
+from database import get_db, get_read_db, run_read
 from schemas import AlertOut
-from auth import get_current_user
+from auth import get_current_user, user_from_token
 from models import Alert
 from utils.alert_helper import create_alert
+from utils.alert_bus import (
+    alert_bus, cached_unread, set_unread, adjust_unread, publish_unread
+)
+
+SSE_HEARTBEAT_SECONDS = int(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
 
 router = APIRouter(prefix="/alerts", tags=["Alerts"])
 
@@ -13,21 +26,21 @@ router = APIRouter(prefix="/alerts", tags=["Alerts"])
 # GET ALERTS (ALL / READ / UNREAD)
 # =================================================
 @router.get("/", response_model=list[AlertOut])
-def get_alerts(
+async def get_alerts(
     status: str | None = None,   # all | read | unread
-    db: Session = Depends(get_db),
+    db = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
-    query = db.query(Alert).filter(
+    query = select(Alert).where(
         Alert.user_id == current_user.id
     )
 
     if status == "read":
-        query = query.filter(Alert.is_read == True)
+        query = query.where(Alert.is_read == True)
     elif status == "unread":
-        query = query.filter(Alert.is_read == False)
+        query = query.where(Alert.is_read == False)
 
-    return query.order_by(Alert.created_at.desc()).all()
+    return (await run_read(db, query.order_by(Alert.created_at.desc()))).scalars().all()
 
 
 # =================================================
@@ -50,6 +63,9 @@ def toggle_alert_status(
     alert.is_read = not alert.is_read
     db.commit()
 
+    unread = adjust_unread(current_user.id, -1 if alert.is_read else 1)
+    publish_unread(current_user.id, unread)
+
     return {"message": "Alert status updated"}
 
 
@@ -57,33 +73,80 @@ def toggle_alert_status(
 # UNREAD ALERT COUNT (🔔 BELL)
 # =================================================
 @router.get("/unread-count")
-def unread_alert_count(
-    db: Session = Depends(get_db),
+async def unread_alert_count(
+    db = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
-    count = db.query(Alert).filter(
-        Alert.user_id == current_user.id,
-        Alert.is_read == False
-    ).count()
+    # counted once, then kept up to date by alert_helper / toggle
+    count = cached_unread(current_user.id)
+    if count is None:
+        count = (await run_read(db,
+            select(func.count(Alert.id)).where(
+                Alert.user_id == current_user.id,
+                Alert.is_read == False
+            )
+        )).scalar()
+        set_unread(current_user.id, count)
 
     return {"unread": count}
 
 
+# =================================================
+# LIVE ALERTS (SERVER-SENT EVENTS)
+# =================================================
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+@router.get("/stream")
+async def alert_stream(
+    request: Request,
+    token: str = Query(...)     # EventSource cannot send an Authorization header
+):
+    """
+    Pushes `alert` events ({alert, unread}) and `unread` events ({unread})
+    as they happen. unread is null when the count is not cached; fetch
+    /alerts/unread-count then. Holds no DB connection while open.
+    """
+    user = await run_in_threadpool(user_from_token, token)
+
+    async def events():
+        sub = alert_bus.subscribe(user.id)
+        _, queue = sub
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                # the same dict goes to every tab of this user: don't mutate
+                yield sse(event["event"], {k: v for k, v in event.items() if k != "event"})
+        finally:
+            alert_bus.unsubscribe(user.id, sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # =================================================
 # LATEST ALERTS (FOR BELL DROPDOWN)
 # =================================================
 @router.get("/latest", response_model=list[AlertOut])
-def latest_alerts(
-    db: Session = Depends(get_db),
+async def latest_alerts(
+    db = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
-    return (
-        db.query(Alert)
-        .filter(Alert.user_id == current_user.id)
+    return (await run_read(db,
+        select(Alert)
+        .where(Alert.user_id == current_user.id)
         .order_by(Alert.created_at.desc())
         .limit(5)
-        .all()
-    )
+    )).scalars().all()
 
 
 # =================================================
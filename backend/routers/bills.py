@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from datetime import date, timedelta
+from datetime import date
 
 from database import get_db
 from models import Bill, Alert
 from schemas import BillCreate, BillUpdate, BillResponse, BillStatus
 from auth import get_current_user
-from utils.alert_helper import create_alert
+from utils.alert_bus import forget_unread
 
 router = APIRouter(
     prefix="/bills",
@@ -60,7 +60,7 @@ def create_bill(
 
 
 # =========================
-# LIST BILLS + SAFE ALERT
+# LIST BILLS (bill_due alerts come from utils/alert_rules.py)
 # =========================
 @router.get("/", response_model=list[BillResponse])
 def list_bills(
@@ -71,37 +71,15 @@ def list_bills(
         Bill.user_id == current_user.id
     ).all()
 
-    today_plus_3 = date.today() + timedelta(days=3)
     response = []
-
     for bill in bills:
         current_status = calculate_status(bill.due_date, bill.status)
-
-        # 🔔 BILL DUE ALERT (NO DUPLICATES)
-        if current_status != BillStatus.paid and bill.due_date <= today_plus_3:
-            existing_alert = db.query(Alert).filter(
-                Alert.user_id == current_user.id,
-                Alert.alert_type == "bill_due",
-                Alert.message == f"{bill.biller_name} bill due on {bill.due_date}"
-            ).first()
-
-            if not existing_alert:
-                create_alert(
-                    db=db,
-                    user_id=current_user.id,
-                    title="Bill Due Reminder",
-                    alert_type="bill_due",
-                    message=f"{bill.biller_name} bill due on {bill.due_date}",
-                    severity="info"
-                )
-
         response.append({
             **bill.__dict__,
             "status": current_status,
             "overdue": calculate_overdue(bill.due_date, current_status)
         })
 
-    db.commit()
     return response
 
 
@@ -172,5 +150,6 @@ def delete_bill(
 
     db.delete(bill)
     db.commit()
+    forget_unread(current_user.id)
 
     return {"message": "Bill deleted successfully"}
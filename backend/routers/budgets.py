@@ -3,9 +3,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, extract
 
 from database import get_db
-from models import Budget, Transaction, Alert
+from models import Budget, Transaction, Account
 from schemas import BudgetCreate, BudgetResponse
-from utils.alert_helper import create_alert
+from utils.dates import month_bounds
 from auth import get_current_user
 
 router = APIRouter(
@@ -50,7 +50,7 @@ def list_budgets(
 
 
 # =================================================
-# BUDGET PROGRESS + SAFE ALERT
+# BUDGET PROGRESS (budget_exceeded alerts come from utils/alert_rules.py)
 # =================================================
 @router.get("/progress", response_model=list[BudgetResponse])
 def budget_progress(
@@ -61,39 +61,46 @@ def budget_progress(
         Budget.user_id == current_user.id
     ).all()
 
-    for b in budgets:
-        spent = db.query(func.sum(Transaction.amount)).filter(
-            Transaction.category == b.category,
+    if not budgets:
+        return budgets
+
+    # 🔹 ONE GROUPED QUERY FOR ALL BUDGETS (scoped to this user)
+    range_start, _ = month_bounds(*min((b.year, b.month) for b in budgets))
+    _, range_end = month_bounds(*max((b.year, b.month) for b in budgets))
+
+    txn_year = extract("year", Transaction.txn_date)
+    txn_month = extract("month", Transaction.txn_date)
+    spend_rows = (
+        db.query(
+            Transaction.category,
+            txn_year.label("year"),
+            txn_month.label("month"),
+            func.sum(Transaction.amount).label("spent")
+        )
+        .join(Account, Transaction.account_id == Account.id)
+        .filter(
+            Account.user_id == current_user.id,
             Transaction.txn_type == "debit",
-            extract("month", Transaction.txn_date) == b.month,
-            extract("year", Transaction.txn_date) == b.year
-        ).scalar() or 0
-
-        b.spent_amount = spent
+            Transaction.category.in_({b.category for b in budgets}),
+            Transaction.txn_date >= range_start,
+            Transaction.txn_date < range_end
+        )
+        .group_by(Transaction.category, txn_year, txn_month)
+        .all()
+    )
+    spend = {
+        (r.category, int(r.year), int(r.month)): r.spent
+        for r in spend_rows
+    }
 
-        if spent > b.limit_amount:
+    # not committed: GET stays read-only
+    for b in budgets:
+        b.spent_amount = spend.get((b.category, b.year, b.month)) or 0
+        if b.spent_amount > b.limit_amount:
             b.warning = "⚠️ Budget limit exceeded"
-
-            # 🔒 CHECK IF ALERT ALREADY EXISTS
-            existing_alert = db.query(Alert).filter(
-                Alert.user_id == current_user.id,
-                Alert.alert_type == "budget_exceeded",
-                Alert.message == f"{b.category} budget exceeded for {b.month}/{b.year}"
-            ).first()
-
-            if not existing_alert:
-                create_alert(
-                    db=db,
-                    user_id=current_user.id,
-                    title="Budget Exceeded",
-                    alert_type="budget_exceeded",
-                    message=f"{b.category} budget exceeded for {b.month}/{b.year}",
-                    severity="warning"
-                )
         else:
             b.warning = "Within limit"
 
-    db.commit()
     return budgets
 
 
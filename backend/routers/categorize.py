@@ -6,6 +6,7 @@ from database import get_db
 from auth import get_current_user
 from models import Category, User
 from schemas import CategoryCreate, CategoryResponse
+from utils.categorizer import categorizer
 
 router = APIRouter(
     prefix="/categories",
@@ -41,6 +42,7 @@ def create_category(
     db.add(cat)
     db.commit()
     db.refresh(cat)
+    categorizer.invalidate()
 
     return cat
 
@@ -63,6 +65,7 @@ def update_category(
 
     db.commit()
     db.refresh(cat)
+    categorizer.invalidate()
 
     return cat
 
@@ -81,26 +84,23 @@ def delete_category(
 
     db.delete(cat)
     db.commit()
+    categorizer.invalidate()
 
     return {"message": "Category deleted successfully"}
 
 
 def auto_assign_category(db, transaction):
+    return category_for_text(db, transaction.merchant, transaction.description)
+
+
+def category_for_text(db, merchant, description):
     text = ""
 
     # take merchant and description text
-    if transaction.merchant:
-        text += transaction.merchant.lower() + " "
-    if transaction.description:
-        text += transaction.description.lower()
-
-    # get all categories from DB
-    categories = db.query(Category).all()
-
-    # match keywords
-    for cat in categories:
-        if cat.keywords:
-            words = cat.keywords.split(",")
-            for word in words:
-                if word.strip().lower() in text:
-                    return cat.name
+    if merchant:
+        text += merchant.lower() + " "
+    if description:
+        text += description.lower()
+
+    # match against compiled keywords (no DB query once loaded)
+    return categorizer.match(db, text)
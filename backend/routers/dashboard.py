@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select, case, and_, literal
 from datetime import datetime
 
-from database import get_db
+from database import get_read_db, run_read
 from auth import get_current_user
-from models import User, Account, Transaction,Reward
+from models import User, Account, Reward, MonthlySummary
+from utils.dates import month_bounds
+from utils.ledger import user_balance_total
 
 router = APIRouter(
     prefix="/dashboard",
@@ -14,81 +15,62 @@ router = APIRouter(
 
 # 🔹 DASHBOARD SUMMARY API
 @router.get("/summary")
-def get_dashboard_summary(
-    db: Session = Depends(get_db),
+async def get_dashboard_summary(
+    db=Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    # Total accounts
-    total_accounts = db.query(Account).filter(
-        Account.user_id == current_user.id
-    ).count()
-
-    # Total balance (sum of all accounts)
-    total_balance = db.query(func.sum(Account.balance)).filter(
-        Account.user_id == current_user.id
-    ).scalar() or 0
-
-    # Current month & year
+    # Current month as a half-open range [start, next)
     now = datetime.now()
-    month = now.month
-    year = now.year
-
-    # Monthly income
-    income = (
-        db.query(func.sum(Transaction.amount))
-        .join(Account)
-        .filter(
-            Account.user_id == current_user.id,
-            Transaction.txn_type == "credit",
-            func.extract("month", Transaction.txn_date) == month,
-            func.extract("year", Transaction.txn_date) == year,
-        )
-        .scalar()
-        or 0
+    month_start, next_month = month_bounds(now.year, now.month)
+    in_month = and_(
+        MonthlySummary.month >= month_start.date(),
+        MonthlySummary.month < next_month.date()
     )
 
-    # Monthly expenses
-    expenses = (
-        db.query(func.sum(Transaction.amount))
-        .join(Account)
-        .filter(
-            Account.user_id == current_user.id,
-            Transaction.txn_type == "debit",
-            func.extract("month", Transaction.txn_date) == month,
-            func.extract("year", Transaction.txn_date) == year,
-        )
-        .scalar()
-        or 0
+    # Per-user scalars, evaluated once inside the same statement
+    total_accounts = (
+        select(func.count(Account.id))
+        .where(Account.user_id == current_user.id)
+        .scalar_subquery()
     )
+    total_balance = user_balance_total(current_user.id)
     reward_points = (
-        db.query(func.sum(Reward.points_balance))
-        .filter(Reward.user_id == current_user.id)
-        .scalar()
-        or 0
-        )
-    spending = (
-        db.query(Transaction.category, func.sum(Transaction.amount))
-        .join(Account)
-        .filter(
-            Account.user_id == current_user.id,
-            Transaction.txn_type == "debit"
-            )
-            .group_by(Transaction.category)
-            .all()
-            )
-    spending_distribution = [
-        {"category": c or "Others", "amount": float(a)}
-        for c, a in spending
-        ]
+        select(func.coalesce(func.sum(Reward.points_balance), 0))
+        .where(Reward.user_id == current_user.id)
+        .scalar_subquery()
+    )
 
+    # One row per category from the maintained monthly summaries.
+    # The outer join keeps a row even when the user has no data yet.
+    anchor = select(literal(1).label("one")).subquery()
+    rows = (await run_read(db,
+        select(
+            MonthlySummary.category,
+            func.sum(MonthlySummary.expenses).label("spent"),
+            func.sum(case((in_month, MonthlySummary.income), else_=0)).label("income"),
+            func.sum(case((in_month, MonthlySummary.expenses), else_=0)).label("expenses"),
+            total_accounts.label("accounts"),
+            total_balance.label("balance"),
+            reward_points.label("reward_points")
+        )
+        .select_from(anchor)
+        .outerjoin(MonthlySummary, MonthlySummary.user_id == current_user.id)
+        .group_by(MonthlySummary.category)
+    )).all()
 
+    first = rows[0]
+    spending_distribution = [
+        {"category": r.category or "Others", "amount": float(r.spent)}
+        for r in rows
+        if r.category is not None and r.spent
+    ]
 
     return {
-        "balance": float(total_balance),
-        "accounts": total_accounts,
-        "income": float(income),
-        "expenses": float(expenses),
-        "reward_points": int(reward_points), 
+        "balance": float(first.balance or 0),
+        "accounts": int(first.accounts or 0),
+        "income": float(sum(r.income or 0 for r in rows)),
+        "expenses": float(sum(r.expenses or 0 for r in rows)),
+        "reward_points": int(first.reward_points or 0),
         "spending_distribution": spending_distribution
 
     }
@@ -1,16 +1,16 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse, FileResponse
 from sqlalchemy.orm import Session
 from io import StringIO
 import csv
-from datetime import datetime
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
 import os
+from datetime import datetime
+from typing import Optional
 
-from database import get_db
+from database import get_db, SessionLocal
 from auth import get_current_user
 from models import User, Transaction, Account
+from utils.pdf_jobs import submit_pdf_job, get_pdf_job
 
 router = APIRouter(
     prefix="/exports",
@@ -18,49 +18,88 @@ router = APIRouter(
 )
 
 # =====================================================
-# EXPORT TRANSACTIONS AS CSV
+# EXPORT TRANSACTIONS AS CSV (STREAMED)
 # =====================================================
-@router.get("/transactions/csv")
-def export_transactions_csv(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    transactions = (
-        db.query(Transaction)
-        .join(Account)
-        .filter(Account.user_id == current_user.id)
-        .all()
-    )
-
-    output = StringIO()
-    writer = csv.writer(output)
-
-    # CSV HEADER
-    writer.writerow([
-        "Transaction ID",
-        "Account ID",
-        "Type",
-        "Amount",
-        "Category",
-        "Merchant",
-        "Date"
-    ])
-
-    for txn in transactions:
+CSV_CHUNK_ROWS = 1000
+
+
+def stream_transactions_csv(user_id, account_id, date_from, date_to):
+    # own session: it must outlive the request handler while streaming
+    db = SessionLocal()
+    try:
+        query = (
+            db.query(
+                Transaction.id,
+                Transaction.account_id,
+                Transaction.txn_type,
+                Transaction.amount,
+                Transaction.category,
+                Transaction.merchant,
+                Transaction.txn_date
+            )
+            .join(Account)
+            .filter(Account.user_id == user_id)
+        )
+
+        if account_id is not None:
+            query = query.filter(Transaction.account_id == account_id)
+        if date_from:
+            query = query.filter(Transaction.txn_date >= date_from)
+        if date_to:
+            query = query.filter(Transaction.txn_date < date_to)
+
+        # server-side cursor, rows arrive in batches
+        rows = query.execution_options(
+            stream_results=True,
+            yield_per=CSV_CHUNK_ROWS
+        )
+
+        output = StringIO()
+        writer = csv.writer(output)
+
+        # CSV HEADER
         writer.writerow([
-            txn.id,
-            txn.account_id,
-            txn.txn_type,
-            float(txn.amount),
-            txn.category,
-            txn.merchant,
-            txn.txn_date.strftime("%Y-%m-%d") if txn.txn_date else ""
+            "Transaction ID",
+            "Account ID",
+            "Type",
+            "Amount",
+            "Category",
+            "Merchant",
+            "Date"
         ])
 
-    output.seek(0)
+        count = 0
+        for txn in rows:
+            writer.writerow([
+                txn.id,
+                txn.account_id,
+                txn.txn_type,
+                float(txn.amount),
+                txn.category,
+                txn.merchant,
+                txn.txn_date.strftime("%Y-%m-%d") if txn.txn_date else ""
+            ])
+            count += 1
+
+            if count % CSV_CHUNK_ROWS == 0:
+                yield output.getvalue().encode("utf-8")
+                output.seek(0)
+                output.truncate(0)
+
+        yield output.getvalue().encode("utf-8")
+    finally:
+        db.close()
+
 
+@router.get("/transactions/csv")
+def export_transactions_csv(
+    account_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user)
+):
     return StreamingResponse(
-        output,
+        stream_transactions_csv(current_user.id, account_id, date_from, date_to),
         media_type="text/csv",
         headers={
             "Content-Disposition": "attachment; filename=transactions.csv"
@@ -68,51 +107,56 @@ def export_transactions_csv(
     )
 
 # =====================================================
-# EXPORT TRANSACTIONS AS PDF
+# EXPORT TRANSACTIONS AS PDF (BACKGROUND JOB)
 # =====================================================
-@router.get("/transactions/pdf")
+@router.post("/transactions/pdf")
 def export_transactions_pdf(
+    account_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
-    # ✅ ensure folder exists
-    export_dir = "exports"
-    os.makedirs(export_dir, exist_ok=True)
+    filters = {
+        "account_id": account_id,
+        "date_from": date_from,
+        "date_to": date_to
+    }
+    job_id, job = submit_pdf_job(db, current_user.id, filters)
 
-    file_path = os.path.join(
-        export_dir,
-        f"transactions_{current_user.id}.pdf"
-    )
+    return {"job_id": job_id, "status": job["status"]}
 
-    transactions = (
-        db.query(Transaction)
-        .join(Account)
-        .filter(Account.user_id == current_user.id)
-        .all()
-    )
 
-    c = canvas.Canvas(file_path, pagesize=A4)
-    width, height = A4
+@router.get("/jobs/{job_id}")
+def get_export_job(
+    job_id: str,
+    current_user=Depends(get_current_user)
+):
+    job = get_pdf_job(current_user.id, job_id)
 
-    y = height - 50
-    c.setFont("Helvetica", 10)
-    c.drawString(50, y, "Transaction Report")
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
 
-    y -= 30
+    return {"job_id": job_id, "status": job["status"], "error": job["error"]}
 
-    for txn in transactions:
-        text = f"{txn.txn_date.date()} | {txn.description} | {txn.amount} | {txn.txn_type}"
-        c.drawString(50, y, text)
-        y -= 15
 
-        if y < 50:
-            c.showPage()
-            y = height - 50
+@router.get("/jobs/{job_id}/download")
+def download_export_job(
+    job_id: str,
+    current_user=Depends(get_current_user)
+):
+    job = get_pdf_job(current_user.id, job_id)
 
-    c.save()
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail="Export not ready")
+    # replaced by a newer render of the same statement since
+    if not os.path.exists(job["path"]):
+        raise HTTPException(status_code=404, detail="Export no longer available, export again")
 
     return FileResponse(
-        path=file_path,
+        path=job["path"],
         filename=f"transactions_{current_user.id}.pdf",
         media_type="application/pdf"
     )
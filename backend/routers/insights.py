@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import func, select
 from datetime import datetime, timedelta
+from typing import Optional
 
-from database import get_db
-from models import Transaction, Account
+from database import get_read_db, run_read
+from models import Transaction, Account, MonthlySummary
+from utils.dates import add_months
+from utils.response_cache import cache_per_user
 from auth import get_current_user
 
 router = APIRouter(prefix="/insights", tags=["Insights"])
@@ -13,33 +15,51 @@ router = APIRouter(prefix="/insights", tags=["Insights"])
 # ===============================
 # Monthly Cashflow
 # ===============================
+def parse_month(value):
+    try:
+        return datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Month must be YYYY-MM")
+
+
 @router.get("/monthly-cashflow")
-def monthly_cashflow(
-    db: Session = Depends(get_db),
+@cache_per_user
+async def monthly_cashflow(
+    request: Request,
+    from_month: Optional[str] = Query(None, alias="from"),   # YYYY-MM, inclusive
+    to_month: Optional[str] = Query(None, alias="to"),       # YYYY-MM, inclusive
+    db=Depends(get_read_db),
     current_user=Depends(get_current_user)
 ):
-    results = (
-        db.query(
-            func.date_trunc("month", Transaction.txn_date).label("month"),
-            Transaction.txn_type,
-            func.sum(Transaction.amount).label("total")
+    # served from the incrementally maintained monthly rollup
+    query = (
+        select(
+            MonthlySummary.month,
+            func.sum(MonthlySummary.income).label("income"),
+            func.sum(MonthlySummary.expenses).label("expense"),
+            func.sum(MonthlySummary.txn_count).label("count")
         )
-        .join(Account, Account.id == Transaction.account_id)
-        .filter(Account.user_id == current_user.id)
-        .group_by("month", Transaction.txn_type)
-        .order_by("month")
-        .all()
+        .where(MonthlySummary.user_id == current_user.id)
+        .group_by(MonthlySummary.month)
+        .order_by(MonthlySummary.month)
     )
 
+    if from_month:
+        query = query.where(MonthlySummary.month >= parse_month(from_month))
+    if to_month:
+        query = query.where(MonthlySummary.month < add_months(parse_month(to_month), 1))
+
+    results = (await run_read(db, query)).all()
+
     data = {}
     for row in results:
-        month = row.month.strftime("%Y-%m")
-        data.setdefault(month, {"income": 0, "expense": 0})
-
-        if row.txn_type == "credit":
-            data[month]["income"] += float(row.total)
-        else:
-            data[month]["expense"] += float(row.total)
+        if not row.count:
+            continue
+        data[row.month.strftime("%Y-%m")] = {
+            "income": float(row.income),
+            "expense": float(row.expense),
+            "count": int(row.count)
+        }
 
     return data
 
@@ -48,23 +68,24 @@ def monthly_cashflow(
 # Spending by Category
 # ===============================
 @router.get("/spending-by-category")
-def spending_by_category(
-    db: Session = Depends(get_db),
+@cache_per_user
+async def spending_by_category(
+    request: Request,
+    db=Depends(get_read_db),
     current_user=Depends(get_current_user)
 ):
-    results = (
-        db.query(
+    results = (await run_read(db,
+        select(
             Transaction.category,
             func.sum(Transaction.amount).label("total")
         )
         .join(Account, Account.id == Transaction.account_id)
-        .filter(
+        .where(
             Account.user_id == current_user.id,
             Transaction.txn_type == "debit"
         )
         .group_by(Transaction.category)
-        .all()
-    )
+    )).all()
 
     return [
         {"category": r.category or "Other", "amount": float(r.total)}
@@ -76,25 +97,26 @@ def spending_by_category(
 # Top Merchants
 # ===============================
 @router.get("/top-merchants")
-def top_merchants(
-    db: Session = Depends(get_db),
+@cache_per_user
+async def top_merchants(
+    request: Request,
+    db=Depends(get_read_db),
     current_user=Depends(get_current_user)
 ):
-    results = (
-        db.query(
+    results = (await run_read(db,
+        select(
             Transaction.merchant,
             func.sum(Transaction.amount).label("total")
         )
         .join(Account, Account.id == Transaction.account_id)
-        .filter(
+        .where(
             Account.user_id == current_user.id,
             Transaction.txn_type == "debit"
         )
         .group_by(Transaction.merchant)
         .order_by(func.sum(Transaction.amount).desc())
         .limit(5)
-        .all()
-    )
+    )).all()
 
     return [
         {"merchant": r.merchant or "Unknown", "amount": float(r.total)}
@@ -106,23 +128,23 @@ def top_merchants(
 # Burn Rate (Last 30 Days)
 # ===============================
 @router.get("/burn-rate")
-def burn_rate(
-    db: Session = Depends(get_db),
+@cache_per_user
+async def burn_rate(
+    request: Request,
+    db=Depends(get_read_db),
     current_user=Depends(get_current_user)
 ):
     start_date = datetime.utcnow() - timedelta(days=30)
 
-    total_spent = (
-        db.query(func.sum(Transaction.amount))
+    total_spent = (await run_read(db,
+        select(func.sum(Transaction.amount))
         .join(Account, Account.id == Transaction.account_id)
-        .filter(
+        .where(
             Account.user_id == current_user.id,
             Transaction.txn_type == "debit",
             Transaction.txn_date >= start_date
         )
-        .scalar()
-        or 0
-    )
+    )).scalar() or 0
 
     return {
         "burn_rate": round(float(total_spent) / 30, 2)
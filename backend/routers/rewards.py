@@ -1,11 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 from database import get_db
 from auth import get_current_user
 from models import Reward, Account, Transaction, User
 from schemas import RewardCreate, RewardUpdate, RewardResponse
 from utils.alert_helper import create_alert  
+from utils.aggregates import record_transactions
+from utils.response_cache import bump_user_version
+from utils.balances import add_reward_points, spend_reward_points
+from utils.idempotency import idempotent
+from utils.ledger import post_transactions
 
 router = APIRouter(
     prefix="/rewards",
@@ -27,7 +34,11 @@ def create_reward(
         points_balance=reward.points_balance
     )
     db.add(new_reward)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Reward program already exists")
     db.refresh(new_reward)
     return new_reward
 
@@ -44,16 +55,14 @@ def list_rewards(
         Reward.program_name == "Bank Rewards"
     ).first()
 
-    # 🔥 Auto-create if missing
+    # 🔥 Auto-create if missing (upsert: safe against a concurrent create)
     if not reward:
-        reward = Reward(
-            user_id=current_user.id,
-            program_name="Bank Rewards",
-            points_balance=0
-        )
-        db.add(reward)
+        add_reward_points(db, current_user.id, "Bank Rewards", 0)
         db.commit()
-        db.refresh(reward)
+        reward = db.query(Reward).filter(
+            Reward.user_id == current_user.id,
+            Reward.program_name == "Bank Rewards"
+        ).first()
 
     # Frontend expects array
     return [reward]
@@ -109,42 +118,34 @@ def delete_reward(
 # REDEEM REWARDS (FINAL & FIXED)
 # =====================================================
 @router.post("/redeem")
+@idempotent
 def redeem_rewards(
+    request: Request,
     account_id: int = Query(...),
     points: int = Query(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    reward = db.query(Reward).filter(
-        Reward.user_id == current_user.id,
-        Reward.program_name == "Bank Rewards"
-    ).first()
-
-    if not reward or reward.points_balance < points:
-        raise HTTPException(status_code=400, detail="Not enough reward points")
-
     credited_amount = points // 10  # 10 points = ₹1
 
     if credited_amount <= 0:
         raise HTTPException(status_code=400, detail="Minimum 10 points required")
 
-    account = db.query(Account).filter(
+    # ✅ DEDUCT POINTS (ATOMIC, ONLY IF ENOUGH ARE LEFT)
+    remaining = spend_reward_points(db, current_user.id, "Bank Rewards", points)
+    if remaining is None:
+        raise HTTPException(status_code=400, detail="Not enough reward points")
+
+    # raising here rolls the points back too
+    if db.scalar(select(Account.id).where(
         Account.id == account_id,
         Account.user_id == current_user.id
-    ).first()
-
-    if not account:
+    )) is None:
         raise HTTPException(status_code=404, detail="Account not found")
 
-    # ✅ CREDIT ACCOUNT
-    account.balance += credited_amount
-
-    # ✅ DEDUCT POINTS
-    reward.points_balance -= points
-
     # ✅ RECORD TRANSACTION
     txn = Transaction(
-        account_id=account.id,
+        account_id=account_id,
         amount=credited_amount,
         txn_type="credit",
         description="Reward Redeemed",
@@ -152,7 +153,13 @@ def redeem_rewards(
         txn_date=datetime.utcnow()
     )
 
+    # ✅ CREDIT ACCOUNT (LEDGER ENTRY)
     db.add(txn)
+    db.flush()
+    post_transactions(db, [txn])
+    record_transactions(db, current_user.id, [
+        (txn.txn_date, txn.category, txn.txn_type, txn.amount)
+    ])
 
     # 🔔 ALERT (MUST BE BEFORE RETURN)
     create_alert(
@@ -164,9 +171,10 @@ def redeem_rewards(
     )
 
     db.commit()
+    bump_user_version(current_user.id)
 
     return {
         "message": "Reward redeemed successfully",
         "credited_amount": credited_amount,
-        "remaining_points": reward.points_balance
+        "remaining_points": remaining
     }
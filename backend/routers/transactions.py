@@ -1,103 +1,167 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import tuple_, insert, select
+from typing import List, Optional
+import base64
 import csv, io
 from datetime import datetime
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 
-from routers.categorize import auto_assign_category
-from database import get_db
+from routers.categorize import auto_assign_category, category_for_text
+from database import get_db, get_read_db, run_read
 from auth import get_current_user
-from models import User, Account, Transaction, Category, Reward
-from schemas import TransactionCreate, TransactionResponse
-from utils.alert_helper import create_alert
+from models import User, Account, Transaction, Category
+from schemas import TransactionCreate, TransactionResponse, TransactionPage
+from utils.alert_helper import create_alerts
+from utils.aggregates import record_transactions
+from utils.alert_rules import LOW_BALANCE_THRESHOLD, low_balance_message
+from utils.balances import to_money, add_reward_points
+from utils.idempotency import idempotent
+from utils.ledger import post_transactions, live_balance
+from utils.response_cache import bump_user_version
 
 router = APIRouter(
     prefix="/transactions",
     tags=["Transactions"]
 )
 
-@router.get("/")
-def get_all_transactions(
-    db: Session = Depends(get_db),
+# =====================================================
+# GET ALL TRANSACTIONS (KEYSET PAGINATION)
+# =====================================================
+def encode_cursor(txn_date, txn_id):
+    raw = f"{txn_date.isoformat()}|{txn_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        txn_date, txn_id = raw.split("|")
+        return datetime.fromisoformat(txn_date), int(txn_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/", response_model=TransactionPage)
+async def get_all_transactions(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    account_id: Optional[int] = None,
+    category: Optional[str] = None,
+    merchant: Optional[str] = None,
+    txn_type: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    db = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    return (
-        db.query(Transaction)
+    query = (
+        select(Transaction)
         .join(Account, Transaction.account_id == Account.id)
-        .filter(Account.user_id == current_user.id)
-        .order_by(Transaction.txn_date.desc())
-        .all()
+        .where(Account.user_id == current_user.id)
     )
 
-# =====================================================
-# GET ALL TRANSACTIONS
-# =====================================================
+    # -------------------------------
+    # FILTERS
+    # -------------------------------
+    if account_id is not None:
+        query = query.where(Transaction.account_id == account_id)
+    if category:
+        query = query.where(Transaction.category == category)
+    if merchant:
+        query = query.where(Transaction.merchant == merchant)
+    if txn_type:
+        query = query.where(Transaction.txn_type == txn_type.lower())
+    if date_from:
+        query = query.where(Transaction.txn_date >= date_from)
+    if date_to:
+        query = query.where(Transaction.txn_date < date_to)
+    if min_amount is not None:
+        query = query.where(Transaction.amount >= min_amount)
+    if max_amount is not None:
+        query = query.where(Transaction.amount <= max_amount)
+
+    # -------------------------------
+    # SEEK PAST LAST ROW OF PREVIOUS PAGE
+    # -------------------------------
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(Transaction.txn_date, Transaction.id)
+            < tuple_(cursor_date, cursor_id)
+        )
+
+    rows = (await run_read(db,
+        query
+        .order_by(Transaction.txn_date.desc(), Transaction.id.desc())
+        .limit(limit + 1)
+    )).scalars().all()
+
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last.txn_date, last.id)
+
+    return {"items": items, "next_cursor": next_cursor}
 
 # =====================================================
 # GET ALL CATEGORIES
 # =====================================================
 @router.get("/categories")
-def get_all_categories(
-    db: Session = Depends(get_db),
+async def get_all_categories(
+    db = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    return db.query(Category).all()
+    return (await run_read(db, select(Category))).scalars().all()
 
 # =====================================================
 # GET TRANSACTIONS FOR ACCOUNT
 # =====================================================
 @router.get("/{account_id}", response_model=List[TransactionResponse])
-def get_transactions(
+async def get_transactions(
     account_id: int,
-    db: Session = Depends(get_db),
+    db = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    account = db.query(Account).filter(
+    account = (await run_read(db, select(Account.id).where(
         Account.id == account_id,
         Account.user_id == current_user.id
-    ).first()
+    ))).first()
 
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
 
-    return db.query(Transaction).filter(
+    return (await run_read(db, select(Transaction).where(
         Transaction.account_id == account_id
-    ).all()
+    ))).scalars().all()
 
 # =====================================================
 # CREATE TRANSACTION (FIXED)
 # =====================================================
 @router.post("/", response_model=TransactionResponse)
+@idempotent
 def create_transaction(
     transaction: TransactionCreate,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    account = db.query(Account).filter(
-        Account.id == transaction.account_id,
-        Account.user_id == current_user.id
-    ).first()
-
-    if not account:
-        raise HTTPException(status_code=404, detail="Account not found")
-
     txn_type = transaction.txn_type.lower()
-    amount = Decimal(str(transaction.amount))
+    amount = to_money(transaction.amount)
 
-    # -------------------------------
-    # UPDATE BALANCE
-    # -------------------------------
-    if txn_type == "credit":
-        account.balance += float(amount)
-    elif txn_type == "debit":
-        account.balance -= float(amount)
-    else:
+    if txn_type not in ("credit", "debit"):
         raise HTTPException(status_code=400, detail="Invalid transaction type")
 
-    # -------------------------------
-    # CREATE TRANSACTION
-    # -------------------------------
+    account_id = db.scalar(select(Account.id).where(
+        Account.id == transaction.account_id,
+        Account.user_id == current_user.id
+    ))
+    if account_id is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+
     new_txn = Transaction(
         account_id=transaction.account_id,
         amount=amount,
@@ -107,35 +171,42 @@ def create_transaction(
         merchant=transaction.merchant,
         currency=transaction.currency or "INR"
     )
-
     new_txn.category = auto_assign_category(db, new_txn)
+
+    # -------------------------------
+    # LEDGER (APPEND ONLY, NO LOCK ON THE ACCOUNT ROW)
+    # -------------------------------
     db.add(new_txn)
+    db.flush()
+    post_transactions(db, [new_txn])
+    record_transactions(db, current_user.id, [
+        (new_txn.txn_date, new_txn.category, txn_type, amount)
+    ])
+    balance = live_balance(db, account_id)
 
     # -------------------------------
-    # ALERTS (SAFE)
+    # ALERTS (ONE INSERT, DEDUPED IN SQL)
     # -------------------------------
-    try:
-        if account.balance < 1000:
-            create_alert(
-                db=db,
-                user_id=current_user.id,
-                alert_type="low_balance",
-                title="Low Balance",
-                message=f"Your account balance is low (₹{account.balance})",
-                severity="warning"
-            )
-
-        if txn_type == "debit" and amount >= 10000:
-            create_alert(
-                db=db,
-                user_id=current_user.id,
-                alert_type="large_transaction",
-                title="Large Transaction",
-                message=f"₹{amount} spent at {transaction.merchant}",
-                severity="warning"
-            )
-    except Exception:
-        pass  # alerts must NEVER block transaction
+    alerts = []
+    if balance < LOW_BALANCE_THRESHOLD:
+        alerts.append({
+            "user_id": current_user.id,
+            "alert_type": "low_balance",
+            "title": "Low Balance",
+            "message": low_balance_message(balance),
+            "severity": "warning"
+        })
+
+    if txn_type == "debit" and amount >= 10000:
+        alerts.append({
+            "user_id": current_user.id,
+            "alert_type": "large_transaction",
+            "title": "Large Transaction",
+            "message": f"₹{amount} spent at {transaction.merchant}",
+            "severity": "warning"
+        })
+
+    create_alerts(db, alerts)
 
     # -------------------------------
     # REWARDS
@@ -144,83 +215,163 @@ def create_transaction(
         points = int(amount // 100)
 
         if points > 0:
-            reward = db.query(Reward).filter(
-                Reward.user_id == current_user.id,
-                Reward.program_name == "Bank Rewards"
-            ).first()
-
-            if not reward:
-                reward = Reward(
-                    user_id=current_user.id,
-                    program_name="Bank Rewards",
-                    points_balance=0
-                )
-                db.add(reward)
-
-            reward.points_balance += points
+            add_reward_points(db, current_user.id, "Bank Rewards", points)
 
     db.commit()
+    bump_user_version(current_user.id)
     db.refresh(new_txn)
-    return new_txn
+    # serialised here so @idempotent can store it for replays
+    return TransactionResponse.model_validate(new_txn)
 
 # =====================================================
-# CSV UPLOAD (FIXED)
+# CSV UPLOAD (STREAMING, BATCHED)
 # =====================================================
+CSV_BATCH_SIZE = 1000
+CSV_MAX_REPORTED_ERRORS = 100
+# Money is NUMERIC(14, 2): below 10^12 once rounded to cents
+CSV_MAX_AMOUNT = Decimal(10) ** (Transaction.amount.type.precision - Transaction.amount.type.scale)
+CENT = Decimal(1).scaleb(-Transaction.amount.type.scale)
+
+
+def csv_text(row, name, default=None):
+    """Optional text column, rejected when longer than the column allows."""
+    value = row.get(name) or default
+    limit = Transaction.__table__.c[name].type.length
+    if value and len(value) > limit:
+        raise ValueError(f"{name} longer than {limit} characters")
+    return value
+
+
+def parse_csv_row(row, accounts, default_account_id):
+    # ---- account_id ----
+    account_id = (row.get("account_id") or "").strip()
+    if not account_id:
+        if default_account_id is None:
+            raise ValueError("No account found")
+        account_id = default_account_id
+    else:
+        account_id = int(account_id) if account_id.isdigit() else None
+        if account_id not in accounts:
+            raise ValueError("Invalid account_id")
+
+    # ---- amount ----
+    amount = (row.get("amount") or "").strip()
+    if not amount:
+        raise ValueError("Missing amount")
+    try:
+        amount = Decimal(amount)
+    except InvalidOperation:
+        raise ValueError("Invalid amount")
+    if not amount.is_finite():
+        raise ValueError("Invalid amount")
+    if abs(amount) < CSV_MAX_AMOUNT:
+        amount = amount.quantize(CENT, rounding=ROUND_HALF_UP)
+    if abs(amount) >= CSV_MAX_AMOUNT:
+        raise ValueError("Amount out of range")
+
+    # ---- txn_type ----
+    txn_type = (row.get("txn_type") or "").strip().lower()
+    if txn_type not in ("credit", "debit"):
+        raise ValueError("Invalid transaction type")
+
+    # ---- txn_date ----
+    txn_date = (
+        datetime.fromisoformat(row["txn_date"])
+        if row.get("txn_date")
+        else datetime.utcnow()
+    )
+
+    return {
+        "account_id": account_id,
+        "description": csv_text(row, "description"),
+        "merchant": csv_text(row, "merchant"),
+        "amount": amount,
+        "txn_type": txn_type,
+        "currency": csv_text(row, "currency", "INR"),
+        "category": csv_text(row, "category"),
+        "txn_date": txn_date,
+    }
+
+
 @router.post("/upload-csv")
 def upload_transactions_csv(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    contents = file.file.read().decode("utf-8").splitlines()
-    reader = csv.DictReader(contents)
-
-    for row in reader:
-        # ---- account_id (safe) ----
-        account_id = row.get("account_id")
-
-        if not account_id:
-            account = db.query(Account).filter(
-                Account.user_id == current_user.id
-            ).first()
-            if not account:
-                raise HTTPException(status_code=400, detail="No account found")
-        else:
-            account = db.query(Account).filter(
-                Account.id == int(account_id),
-                Account.user_id == current_user.id
-            ).first()
-            if not account:
-                raise HTTPException(status_code=403, detail="Invalid account_id")
-
-        # ---- amount ----
-        amount = row.get("amount")
-        if not amount:
-            raise HTTPException(status_code=400, detail="CSV missing amount")
-
-        # ---- txn_date ----
-        txn_date = (
-            datetime.fromisoformat(row["txn_date"])
-            if row.get("txn_date")
-            else datetime.utcnow()
-        )
-
-        txn = Transaction(
-            account_id=account.id,
-            description=row.get("description"),
-            merchant=row.get("merchant"),
-            amount=float(amount),
-            txn_type=row.get("txn_type", "").lower(),
-            currency=row.get("currency", "INR"),
-            category=row.get("category", "Others"),
-            txn_date=txn_date,
-        )
+    # resolve every account the file may reference in one query
+    accounts = [
+        row.id for row in
+        db.query(Account.id)
+        .filter(Account.user_id == current_user.id)
+        .order_by(Account.id)
+        .all()
+    ]
+    default_account_id = accounts[0] if accounts else None
+    accounts = set(accounts)
+
+    # parse the upload incrementally instead of reading it whole
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(stream)
+
+    batch = []
+    inserted = 0
+    failed = 0
+    errors = []
+
+    def flush():
+        if batch:
+            rows = db.execute(
+                insert(Transaction).returning(
+                    Transaction.id,
+                    Transaction.account_id,
+                    Transaction.txn_type,
+                    Transaction.amount
+                ),
+                batch
+            ).all()
+            post_transactions(db, rows)
+            record_transactions(db, current_user.id, [
+                (t["txn_date"], t["category"], t["txn_type"], t["amount"])
+                for t in batch
+            ])
+            batch.clear()
 
-        db.add(txn)
+    try:
+        for line_no, row in enumerate(reader, start=2):
+            try:
+                txn = parse_csv_row(row, accounts, default_account_id)
+            except (ValueError, TypeError) as e:
+                failed += 1
+                if len(errors) < CSV_MAX_REPORTED_ERRORS:
+                    errors.append({"row": line_no, "error": str(e)})
+                continue
+
+            if not txn["category"]:
+                txn["category"] = category_for_text(
+                    db, txn["merchant"], txn["description"]
+                ) or "Others"
+
+            batch.append(txn)
+            inserted += 1
+            if len(batch) >= CSV_BATCH_SIZE:
+                flush()
+    except (UnicodeDecodeError, csv.Error):
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Invalid CSV file")
+    finally:
+        stream.detach()
+
+    flush()
 
     db.commit()
-    return {"message": "CSV uploaded successfully"}
-
+    bump_user_version(current_user.id)
+    return {
+        "message": "CSV uploaded successfully",
+        "inserted": inserted,
+        "failed": failed,
+        "errors": errors
+    }
 
 
 # =====================================================
@@ -233,11 +384,28 @@ def update_transaction_category(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    txn = db.query(Transaction).filter(Transaction.id == txn_id).first()
+    txn = (
+        db.query(Transaction)
+        .join(Account, Transaction.account_id == Account.id)
+        .filter(
+            Transaction.id == txn_id,
+            Account.user_id == current_user.id
+        )
+        .first()
+    )
 
     if not txn:
         raise HTTPException(status_code=404, detail="Transaction not found")
 
+    # move the amount between category summaries
+    record_transactions(db, current_user.id, [
+        (txn.txn_date, txn.category, txn.txn_type, txn.amount)
+    ], sign=-1)
+    record_transactions(db, current_user.id, [
+        (txn.txn_date, category, txn.txn_type, txn.amount)
+    ])
+
     txn.category = category
     db.commit()
+    bump_user_version(current_user.id)
     return {"message": "Category updated"}
@@ -3,28 +3,34 @@ from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordRequestForm
 import re
 from sqlalchemy.exc import IntegrityError
-import random
 
-from models import User, Ticket
+from models import User, Ticket, IdempotencyKey
 from auth import get_current_user
 from schemas import UserResponse, UpdateProfile, ChangePassword, TwoFactorUpdate, UserOut
 from schemas import RegisterUser,ForgotPasswordRequest,VerifyOtpRequest,ResetPasswordRequest
-from auth import hash_password, verify_password, create_access_token
+from auth import hash_password, verify_password, verify_and_update_password, create_access_token
 from database import get_db
+from utils.principal_cache import principal_cache
+from utils.alert_bus import forget_unread
+from utils.otp import issue_otp, verify_otp, consume_reset_window
 import shutil
 import os
-from passlib.context import CryptContext
 router = APIRouter(tags=["Users"])
 
 def get_my_profile(current_user = Depends(get_current_user)):
     return current_user
 
+
+def load_user(db: Session, user_id: int):
+    # current_user is a cached, detached copy; writes need the real row
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user
+
 UPLOAD_DIR = "uploads/profile"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-forgot_otp_store = {}
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-verified_forgot_users = set()
 
 
 # ================= REGISTER =================
@@ -65,10 +71,19 @@ def login(
     db: Session = Depends(get_db)
 ):
     user = db.query(User).filter(User.email == form_data.username).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    if not user or not verify_password(form_data.password, user.password):
+    ok, new_hash = verify_and_update_password(form_data.password, user.password)
+    if not ok:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    # stored hash used an older cost, replace it while we have the password
+    if new_hash:
+        user.password = new_hash
+        db.commit()
+        principal_cache.invalidate(user.id)
+
     token = create_access_token(user.id)
 
     return {
@@ -88,10 +103,11 @@ def update_profile(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    current_user.name = data.name
-    current_user.phone = data.phone
+    user = load_user(db, current_user.id)
+    user.name = data.name
+    user.phone = data.phone
     db.commit()
-    db.refresh(current_user)
+    principal_cache.invalidate(user.id)
     return {"message": "Profile updated successfully"}
 
 
@@ -104,8 +120,10 @@ def change_password(
     if not verify_password(data.current_password, current_user.password):
         raise HTTPException(status_code=400, detail="Current password incorrect")
 
-    current_user.password = hash_password(data.new_password)
+    user = load_user(db, current_user.id)
+    user.password = hash_password(data.new_password)
     db.commit()
+    principal_cache.invalidate(user.id)
     return {"message": "Password updated successfully"}
 
 
@@ -115,8 +133,10 @@ def update_two_factor(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    current_user.two_factor_enabled = data.enabled
+    user = load_user(db, current_user.id)
+    user.two_factor_enabled = data.enabled
     db.commit()
+    principal_cache.invalidate(user.id)
     return {"message": "Two-factor updated"}
 
 
@@ -125,9 +145,13 @@ def delete_account(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    db.query(Ticket).filter(Ticket.user_id == current_user.id).delete()
-    db.delete(current_user)
+    user = load_user(db, current_user.id)
+    db.query(Ticket).filter(Ticket.user_id == user.id).delete()
+    db.query(IdempotencyKey).filter(IdempotencyKey.user_id == user.id).delete()
+    db.delete(user)
     db.commit()
+    principal_cache.invalidate(user.id)
+    forget_unread(user.id)
     return {"message": "Account deleted successfully"}
 
 
@@ -148,13 +172,14 @@ def upload_profile_photo(
     with open(path, "wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
 
-    current_user.profile_image = f"/{path}"
+    user = load_user(db, current_user.id)
+    user.profile_image = f"/{path}"
     db.commit()
-    db.refresh(current_user)
+    principal_cache.invalidate(user.id)
 
     return {
         "message": "Profile image uploaded",
-        "profile_image": current_user.profile_image
+        "profile_image": user.profile_image
     }
 
 
@@ -167,8 +192,7 @@ def forgot_password(data: ForgotPasswordRequest, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=404, detail="Email not found")
 
-    otp = str(random.randint(100000, 999999))
-    forgot_otp_store[email] = otp
+    otp = issue_otp(email)
 
     print("Forgot OTP:", otp)
     return {
@@ -182,7 +206,7 @@ def forgot_password(data: ForgotPasswordRequest, db: Session = Depends(get_db)):
 def verify_forgot_otp(data: VerifyOtpRequest):
     email = data.email.lower().strip()
 
-    if forgot_otp_store.get(email) != data.otp:
+    if not verify_otp(email, data.otp.strip()):
         raise HTTPException(status_code=400, detail="Invalid OTP")
 
     return {"message": "OTP verified"}
@@ -193,12 +217,16 @@ def verify_forgot_otp(data: VerifyOtpRequest):
 def reset_password(data: ResetPasswordRequest, db: Session = Depends(get_db)):
     email = data.email.lower().strip()
 
+    # one reset per verified OTP
+    if not consume_reset_window(email):
+        raise HTTPException(status_code=400, detail="OTP not verified or expired")
+
     user = db.query(User).filter(User.email == email).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.password = pwd_context.hash(data.new_password)
+    user.password = hash_password(data.new_password)
     db.commit()
+    principal_cache.invalidate(user.id)
 
-    forgot_otp_store.pop(email, None)
     return {"message": "Password updated successfully"}
\ No newline at end of file
@@ -125,6 +125,11 @@ class TransactionResponse(BaseModel):
     }
 
 
+class TransactionPage(BaseModel):
+    items: list[TransactionResponse]
+    next_cursor: Optional[str] = None
+
+
 class CategoryCreate(BaseModel):
     name: str
     keywords: str
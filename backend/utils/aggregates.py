@@ -0,0 +1,119 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from database import dialect_insert
+from models import MonthlySummary, Transaction, Account
+from utils.balances import to_money
+
+DEFAULT_CATEGORY = "Others"
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def _upsert(db, rows):
+    stmt = dialect_insert(db, MonthlySummary).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "month", "category"],
+        set_={
+            "income": MonthlySummary.income + stmt.excluded.income,
+            "expenses": MonthlySummary.expenses + stmt.excluded.expenses,
+            "txn_count": MonthlySummary.txn_count + stmt.excluded.txn_count,
+        }
+    )
+    db.execute(stmt)
+
+
+def _fold(totals, txns, sign=1):
+    for txn_date, category, txn_type, amount in txns:
+        key = (month_start(txn_date or datetime.utcnow()), category or DEFAULT_CATEGORY)
+        row = totals.setdefault(key, [Decimal(0), Decimal(0), 0])
+        if txn_type == "credit":
+            row[0] += sign * to_money(amount)
+        else:
+            row[1] += sign * to_money(amount)
+        row[2] += sign
+
+
+def _flush(db, user_id, totals):
+    if not totals:
+        return
+
+    _upsert(db, [
+        {
+            "user_id": user_id,
+            "month": month,
+            "category": category,
+            "income": income,
+            "expenses": expenses,
+            "txn_count": count,
+        }
+        for (month, category), (income, expenses, count) in totals.items()
+    ])
+
+
+def record_transactions(db, user_id, txns, sign=1):
+    """
+    Fold transactions into the user's monthly summary rows.
+    txns is an iterable of (txn_date, category, txn_type, amount);
+    use sign=-1 to take them back out again.
+    Does not commit, the caller owns the transaction.
+    """
+    totals = {}
+    _fold(totals, txns, sign)
+    _flush(db, user_id, totals)
+
+
+def rebuild_monthly_summaries(db, user_id=None):
+    """
+    Recompute summary rows from the transactions table in one
+    streaming pass. Used to backfill existing data:
+        python -m utils.aggregates [--user ID]
+    """
+    delete = db.query(MonthlySummary)
+    rows = (
+        db.query(
+            Account.user_id,
+            Transaction.txn_date,
+            Transaction.category,
+            Transaction.txn_type,
+            Transaction.amount
+        )
+        .join(Account, Account.id == Transaction.account_id)
+        .order_by(Account.user_id)
+    )
+    if user_id is not None:
+        delete = delete.filter(MonthlySummary.user_id == user_id)
+        rows = rows.filter(Account.user_id == user_id)
+
+    delete.delete(synchronize_session=False)
+
+    # rows arrive grouped by user, so only one user's totals are held
+    current_user, totals = None, {}
+    for row in rows.execution_options(stream_results=True, yield_per=5000):
+        if row.user_id != current_user:
+            _flush(db, current_user, totals)
+            current_user, totals = row.user_id, {}
+        _fold(totals, [(row.txn_date, row.category, row.txn_type, row.amount)])
+
+    _flush(db, current_user, totals)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(
+        description="Backfill / rebuild monthly_summaries from transactions"
+    )
+    parser.add_argument("--user", type=int, help="only rebuild this user id")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        rebuild_monthly_summaries(db, args.user)
+        db.commit()
+    finally:
+        db.close()
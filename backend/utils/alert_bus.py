@@ -0,0 +1,104 @@
+"""
+Push side of alerts: in-process pub/sub plus a cached unread counter.
+
+alert_helper hands new alerts to publish_committed() once the session
+commits; every open /alerts/stream of that user gets them as
+server-sent events. Subscribers only see alerts committed by the same
+process; with several workers, clients still catch up from
+/alerts/latest whenever their stream reconnects.
+
+The unread count lives in kv_store (unread:{user_id}) and is adjusted
+in place; when it is missing it is counted once from the database. Only
+a shared store (KV_BACKEND=redis) sees every adjustment, including those
+of other workers and of `python -m utils.alert_rules --loop`, so
+UNREAD_COUNT_TTL defaults to an hour there and to 30s otherwise.
+"""
+import asyncio
+import os
+import threading
+from collections import defaultdict
+
+from utils.kv_store import KV_BACKEND, kv_store
+
+UNREAD_COUNT_TTL = int(os.getenv("UNREAD_COUNT_TTL", "3600" if KV_BACKEND == "redis" else "30"))
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+# ================= UNREAD COUNTER =================
+
+def _unread_key(user_id: int) -> str:
+    return f"unread:{user_id}"
+
+
+def cached_unread(user_id: int):
+    value = kv_store.get(_unread_key(user_id))
+    return None if value is None else int(value)
+
+
+def set_unread(user_id: int, count: int):
+    kv_store.set(_unread_key(user_id), count, ttl=UNREAD_COUNT_TTL)
+
+
+def adjust_unread(user_id: int, delta: int):
+    """New count, or None when it is not cached (next read recounts)."""
+    return kv_store.incr_existing(_unread_key(user_id), delta)
+
+
+def forget_unread(user_id: int):
+    """Call after deleting alerts in bulk."""
+    kv_store.delete(_unread_key(user_id))
+
+
+# ================= PUB/SUB =================
+
+class AlertBus:
+    """Per-user fan-out to asyncio queues, safe to publish from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)    # user_id -> {(loop, queue)}
+
+    def subscribe(self, user_id: int):
+        sub = (asyncio.get_running_loop(), asyncio.Queue(SUBSCRIBER_QUEUE_SIZE))
+        with self._lock:
+            self._subscribers[user_id].add(sub)
+        return sub
+
+    def unsubscribe(self, user_id: int, sub):
+        with self._lock:
+            subs = self._subscribers.get(user_id)
+            if subs:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id: int, event: dict):
+        with self._lock:
+            subs = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subs:
+            loop.call_soon_threadsafe(self._offer, queue, event)
+
+    @staticmethod
+    def _offer(queue, event):
+        # a client that stopped reading loses events instead of memory
+        if not queue.full():
+            queue.put_nowait(event)
+
+
+alert_bus = AlertBus()
+
+
+def publish_committed(alerts: list[dict]):
+    """alerts are the inserted rows (AlertOut fields plus user_id)."""
+    by_user = defaultdict(list)
+    for alert in alerts:
+        by_user[alert["user_id"]].append(alert)
+
+    for user_id, new in by_user.items():
+        unread = adjust_unread(user_id, len(new))
+        for alert in new:
+            alert_bus.publish(user_id, {"event": "alert", "alert": alert, "unread": unread})
+
+
+def publish_unread(user_id: int, unread):
+    alert_bus.publish(user_id, {"event": "unread", "unread": unread})
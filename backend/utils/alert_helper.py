@@ -1,49 +1,97 @@
-from sqlalchemy.exc import IntegrityError
+import hashlib
+
+from sqlalchemy import event
+
+from database import SessionLocal, dialect_insert
 from models import Alert
+from utils.alert_bus import publish_committed
 
+# rows per INSERT; also keeps SQLite under its bound-parameter limit
+ALERT_INSERT_BATCH = 500
 
-def create_alert(
-    db,
+PUSHED_COLUMNS = (
+    Alert.id, Alert.user_id, Alert.title, Alert.alert_type,
+    Alert.message, Alert.severity, Alert.created_at, Alert.is_read,
+)
+
+
+def dedup_key(alert_type: str, message: str) -> str:
+    """Same (alert_type, message) for a user is stored only once."""
+    return hashlib.md5(f"{alert_type}|{message}".encode()).hexdigest()
+
+
+def alert_row(
     user_id: int,
     alert_type: str,
     message: str,
     severity: str = "warning",
     title: str | None = None
-):
+) -> dict:
+    return {
+        "user_id": user_id,
+        "alert_type": alert_type,
+        "title": title or alert_type.replace("_", " ").title(),
+        "message": message,
+        "severity": severity,
+        "is_read": False,
+        "dedup_key": dedup_key(alert_type, message),
+    }
+
+
+def create_alerts(db, alerts: list[dict]) -> int:
     """
-    Safe alert creator.
-    Never breaks transaction flow.
-    Prevents duplicates.
+    Insert candidate alerts, one statement per ALERT_INSERT_BATCH rows.
+    Each dict takes the create_alert arguments (user_id included);
+    duplicates are skipped by the unique (user_id, dedup_key) constraint.
+    Does not commit, the caller owns the transaction; the new alerts
+    are pushed to subscribers once it commits.
+    Returns the number of alerts actually created.
     """
+    rows = {}
+    for data in alerts:
+        row = alert_row(**data)
+        rows.setdefault((row["user_id"], row["dedup_key"]), row)
+
+    rows = list(rows.values())
+    created = []
+    for start in range(0, len(rows), ALERT_INSERT_BATCH):
+        stmt = (
+            dialect_insert(db, Alert)
+            .values(rows[start:start + ALERT_INSERT_BATCH])
+            .on_conflict_do_nothing(index_elements=["user_id", "dedup_key"])
+            .returning(*PUSHED_COLUMNS)
+        )
+        created += [dict(r._mapping) for r in db.execute(stmt)]
+
+    db.info.setdefault("new_alerts", []).extend(created)
+    return len(created)
+
+
+def create_alert(
+    db,
+    user_id: int,
+    alert_type: str,
+    message: str,
+    severity: str = "warning",
+    title: str | None = None
+) -> bool:
+    """Single alert version of create_alerts. Does not commit."""
+    return create_alerts(db, [{
+        "user_id": user_id,
+        "alert_type": alert_type,
+        "message": message,
+        "severity": severity,
+        "title": title,
+    }]) > 0
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _push_new_alerts(session):
+    created = session.info.pop("new_alerts", None)
+    if created:
+        publish_committed(created)
+
 
-    # Prevent duplicate alerts
-    existing = db.query(Alert).filter(
-        Alert.user_id == user_id,
-        Alert.alert_type == alert_type,
-        Alert.message == message
-    ).first()
-
-    if existing:
-        return existing
-
-    alert = Alert(
-        user_id=user_id,
-        alert_type=alert_type,
-        title=title or alert_type.replace("_", " ").title(),
-        message=message,
-        severity=severity,
-        is_read=False  
-    )
-
-    try:
-        db.add(alert)
-        db.commit()
-        db.refresh(alert)
-        return alert
-    except IntegrityError:
-        db.rollback()
-        return None
-    except Exception:
-        # 🔥 MOST IMPORTANT: never break main flow
-        db.rollback()
-        return None
+@event.listens_for(SessionLocal, "after_rollback")
+def _drop_new_alerts(session):
+    session.info.pop("new_alerts", None)
@@ -0,0 +1,152 @@
+"""
+Scheduled alert rules: bills due soon, exceeded budgets, low balances.
+
+Each rule is one set-based query across all users and the alerts are
+written in bulk through create_alerts, so re-running a rule is harmless.
+The app runs them every ALERT_EVAL_INTERVAL seconds (0 disables, e.g.
+when a separate worker does it instead):
+
+    python -m utils.alert_rules            # run once
+    python -m utils.alert_rules --loop     # run forever
+"""
+import argparse
+import logging
+import os
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import select, update, extract, and_, func
+
+from database import SessionLocal
+from models import Account, Bill, Budget, MonthlySummary
+from utils.alert_helper import create_alerts
+from utils.balances import to_money
+from utils.ledger import live_balance_expr
+
+ALERT_EVAL_INTERVAL = int(os.getenv("ALERT_EVAL_INTERVAL", "300"))
+BILL_DUE_DAYS = int(os.getenv("BILL_DUE_DAYS", "3"))
+# overdue bills stay in the window this long, covering runs missed while down;
+# older ones were alerted on already
+BILL_OVERDUE_DAYS = int(os.getenv("BILL_OVERDUE_DAYS", "7"))
+LOW_BALANCE_THRESHOLD = Decimal(os.getenv("LOW_BALANCE_THRESHOLD", "1000"))
+
+
+def bill_due_alerts(db, days: int = BILL_DUE_DAYS, overdue_days: int = BILL_OVERDUE_DAYS):
+    today = date.today()
+    rows = db.execute(
+        select(Bill.user_id, Bill.biller_name, Bill.due_date)
+        .where(
+            Bill.status != "paid",
+            Bill.due_date >= today - timedelta(days=overdue_days),
+            Bill.due_date <= today + timedelta(days=days)
+        )
+    )
+    return [
+        {
+            "user_id": r.user_id,
+            "title": "Bill Due Reminder",
+            "alert_type": "bill_due",
+            "message": f"{r.biller_name} bill due on {r.due_date}",
+            "severity": "info"
+        }
+        for r in rows
+    ]
+
+
+def budget_alerts(db):
+    """
+    Spend comes from the monthly_summaries rollup (0 without a row). The
+    spent_amount stored on each budget is refreshed on the way, for GET
+    /budgets/, writing only the budgets whose spend changed.
+    """
+    rows = db.execute(
+        select(
+            Budget.id,
+            Budget.user_id,
+            Budget.category,
+            Budget.month,
+            Budget.year,
+            Budget.limit_amount,
+            Budget.spent_amount,
+            func.coalesce(MonthlySummary.expenses, 0).label("spent")
+        )
+        .outerjoin(MonthlySummary, and_(
+            MonthlySummary.user_id == Budget.user_id,
+            MonthlySummary.category == Budget.category,
+            extract("year", MonthlySummary.month) == Budget.year,
+            extract("month", MonthlySummary.month) == Budget.month
+        ))
+    ).all()
+
+    changed = [
+        {"id": r.id, "spent_amount": r.spent}
+        for r in rows
+        if r.spent_amount is None or to_money(r.spent_amount) != to_money(r.spent)
+    ]
+    if changed:
+        db.execute(update(Budget), changed)
+
+    return [
+        {
+            "user_id": r.user_id,
+            "title": "Budget Exceeded",
+            "alert_type": "budget_exceeded",
+            "message": f"{r.category} budget exceeded for {r.month}/{r.year}",
+            "severity": "warning"
+        }
+        for r in rows
+        if to_money(r.spent) > to_money(r.limit_amount)
+    ]
+
+
+def low_balance_message(balance) -> str:
+    return f"Your account balance is low (₹{to_money(balance):.2f})"
+
+
+def low_balance_alerts(db, threshold: Decimal = LOW_BALANCE_THRESHOLD):
+    balance = live_balance_expr()
+    rows = db.execute(
+        select(Account.user_id, balance.label("balance")).where(balance < threshold)
+    )
+    # same message as transaction creation, so the two never double up
+    return [
+        {
+            "user_id": r.user_id,
+            "title": "Low Balance",
+            "alert_type": "low_balance",
+            "message": low_balance_message(r.balance),
+            "severity": "warning"
+        }
+        for r in rows
+    ]
+
+
+RULES = (bill_due_alerts, budget_alerts, low_balance_alerts)
+
+
+def evaluate_alert_rules() -> int:
+    """Run every rule and commit once. Returns the number of new alerts."""
+    db = SessionLocal()
+    try:
+        alerts = []
+        for rule in RULES:
+            alerts += rule(db)
+        created = create_alerts(db, alerts)
+        db.commit()
+        return created
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate scheduled alert rules")
+    parser.add_argument("--loop", action="store_true", help="keep running every ALERT_EVAL_INTERVAL seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    while True:
+        print(f"{evaluate_alert_rules()} alerts created")
+        if not args.loop:
+            break
+        time.sleep(ALERT_EVAL_INTERVAL or 300)
@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+from sqlalchemy import update, func
+
+from database import dialect_insert
+from models import Reward
+
+
+def to_money(value) -> Decimal:
+    """Decimal for money maths; floats go through str so 0.1 stays 0.1."""
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def add_reward_points(db, user_id: int, program_name: str, points: int) -> int:
+    """
+    Atomic points_balance += points, creating the program row if needed
+    (INSERT ... ON CONFLICT on the unique (user_id, program_name) index).
+    Returns the new balance.
+    """
+    stmt = dialect_insert(db, Reward).values(
+        user_id=user_id,
+        program_name=program_name,
+        points_balance=points
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "program_name"],
+        set_={
+            "points_balance": Reward.points_balance + stmt.excluded.points_balance,
+            "last_updated": func.now(),
+        }
+    )
+    return db.execute(stmt.returning(Reward.points_balance)).scalar_one()
+
+
+def spend_reward_points(db, user_id: int, program_name: str, points: int):
+    """
+    Atomic points_balance -= points, only if enough points are left.
+    Returns the new balance, or None when nothing was deducted.
+    """
+    return db.execute(
+        update(Reward)
+        .where(
+            Reward.user_id == user_id,
+            Reward.program_name == program_name,
+            Reward.points_balance >= points
+        )
+        .values(points_balance=Reward.points_balance - points)
+        .returning(Reward.points_balance)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
@@ -0,0 +1,86 @@
+import re
+import threading
+import time
+
+from models import Category
+
+
+class KeywordCategorizer:
+    """
+    Process-level keyword matcher.
+    All Category.keywords are compiled into one regex, so a lookup
+    is a single scan of the text with no DB round trip.
+    When several keywords match, the category with the lowest id wins
+    (same order the old per-row loop used).
+    """
+
+    def __init__(self, max_age: int = 300):
+        # other workers can change categories, so reload now and then
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._compiled = None   # (pattern, owner, rank)
+        self._loaded_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._compiled = None
+
+    def _is_stale(self):
+        return (
+            self._compiled is None
+            or time.monotonic() - self._loaded_at > self.max_age
+        )
+
+    def _build(self, db):
+        categories = (
+            db.query(Category.id, Category.name, Category.keywords)
+            .order_by(Category.id)
+            .all()
+        )
+
+        owner = {}
+        rank = {}
+        for priority, (_, name, keywords) in enumerate(categories):
+            if not keywords:
+                continue
+            for word in keywords.split(","):
+                word = word.strip().lower()
+                # first (highest priority) category keeps the keyword
+                if word and word not in owner:
+                    owner[word] = name
+                    rank[word] = priority
+
+        if not owner:
+            return re.compile(r"(?!)"), {}, {}
+
+        # at each position the first alternative wins, so order by
+        # priority, then longest keyword first
+        words = sorted(owner, key=lambda w: (rank[w], -len(w)))
+        alternation = "|".join(re.escape(w) for w in words)
+        return re.compile(f"(?=({alternation}))"), owner, rank
+
+    def _ensure_loaded(self, db):
+        compiled = self._compiled
+        if compiled is not None and not self._is_stale():
+            return compiled
+        with self._lock:
+            if self._is_stale():
+                self._compiled = self._build(db)
+                self._loaded_at = time.monotonic()
+            return self._compiled
+
+    def match(self, db, text: str):
+        pattern, owner, rank = self._ensure_loaded(db)
+
+        best = None
+        for m in pattern.finditer(text.lower()):
+            word = m.group(1)
+            if best is None or rank[word] < rank[best]:
+                best = word
+                if rank[best] == 0:
+                    break
+
+        return owner[best] if best else None
+
+
+categorizer = KeywordCategorizer()
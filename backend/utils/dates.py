@@ -0,0 +1,13 @@
+from datetime import date, datetime
+
+
+def month_bounds(year: int, month: int):
+    """Half-open [start, end) datetimes for a calendar month."""
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start, end
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
@@ -0,0 +1,210 @@
+"""
+Idempotency-Key support for money-moving POST endpoints.
+
+A client that retries a request with the same Idempotency-Key header gets
+the first response back (with Idempotent-Replayed: true) instead of a
+second transaction. Keys are scoped to the user and kept for
+IDEMPOTENCY_TTL seconds in idempotency_keys; kv_store sits in front so a
+replay from the same worker (or any worker, with KV_BACKEND=redis) skips
+the database.
+
+    @router.post("/")
+    @idempotent
+    def create_thing(payload: ..., request: Request, db=..., current_user=...):
+
+The endpoint must take request, db and current_user and return something
+JSON-serialisable (a pydantic model or dict, not an ORM object).
+
+The key is claimed (and committed) before the endpoint runs, so a
+concurrent duplicate gets 409 instead of running twice. If the endpoint
+raises before committing, the claim is released and the key can be
+retried. If it raises after committing (e.g. in bump_user_version), the
+money has moved: the key keeps a 409 saying so and is never re-executed.
+The same goes when the process dies between the endpoint's commit and
+storing the response: the key answers 409 until it expires.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, event, select, update
+
+from database import SessionLocal, dialect_insert
+from models import IdempotencyKey
+from utils.kv_store import kv_store
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", str(24 * 3600)))
+IDEMPOTENCY_PURGE_INTERVAL = int(os.getenv("IDEMPOTENCY_PURGE_INTERVAL", "3600"))
+MAX_KEY_LENGTH = 255
+
+# endpoint arguments that are not part of what the client sent
+NOT_FINGERPRINTED = {"request", "db", "current_user"}
+APPLIED_WITHOUT_RESPONSE = {
+    "detail": f"The request with this {IDEMPOTENCY_HEADER} was applied, but its response was lost"
+}
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _count_commit(session):
+    session.info["commits"] = session.info.get("commits", 0) + 1
+
+
+def request_fingerprint(request, arguments: dict) -> str:
+    payload = {
+        "method": request.method,
+        "path": request.url.path,
+        "arguments": jsonable_encoder({
+            name: value for name, value in arguments.items()
+            if name not in NOT_FINGERPRINTED
+        }),
+    }
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def _cache_key(user_id: int, key: str) -> str:
+    return f"idem:{user_id}:{key}"
+
+
+def _same_request(fingerprint: str, stored_fingerprint: str):
+    if fingerprint != stored_fingerprint:
+        raise HTTPException(
+            status_code=422,
+            detail=f"{IDEMPOTENCY_HEADER} was already used for a different request"
+        )
+
+
+def _replay(status_code: int, body):
+    return JSONResponse(
+        content=body,
+        status_code=status_code,
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+
+def _claim(db, user_id: int, key: str, fingerprint: str):
+    """
+    Insert the key, or take over an expired one. Returns the row id, or
+    None when a live row already exists. Commits, so concurrent duplicates
+    see the claim straight away.
+    """
+    now = datetime.now(timezone.utc)
+    stmt = dialect_insert(db, IdempotencyKey).values(
+        user_id=user_id,
+        key=key,
+        fingerprint=fingerprint,
+        created_at=now,
+        expires_at=now + timedelta(seconds=IDEMPOTENCY_TTL)
+    )
+    claim_id = db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "key"],
+            set_={
+                "fingerprint": stmt.excluded.fingerprint,
+                "status_code": None,
+                "response": None,
+                "created_at": stmt.excluded.created_at,
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=IdempotencyKey.expires_at < now
+        )
+        .returning(IdempotencyKey.id)
+    ).scalar()
+    db.commit()
+    return claim_id
+
+
+def idempotent(func):
+    """Replay the stored response for a repeated Idempotency-Key."""
+
+    @wraps(func)
+    def wrapper(**kwargs):
+        key = kwargs["request"].headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return func(**kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters"
+            )
+
+        db = kwargs["db"]
+        user_id = kwargs["current_user"].id
+        fingerprint = request_fingerprint(kwargs["request"], kwargs)
+        cache_key = _cache_key(user_id, key)
+
+        cached = kv_store.get(cache_key)
+        if cached is not None:
+            cached = json.loads(cached)
+            _same_request(fingerprint, cached["fingerprint"])
+            return _replay(cached["status_code"], cached["body"])
+
+        claim_id = _claim(db, user_id, key, fingerprint)
+        if claim_id is None:
+            stored = db.execute(
+                select(IdempotencyKey).where(
+                    IdempotencyKey.user_id == user_id,
+                    IdempotencyKey.key == key
+                )
+            ).scalar_one()
+            _same_request(fingerprint, stored.fingerprint)
+            if stored.response is None:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"A request with this {IDEMPOTENCY_HEADER} is still in progress"
+                )
+            return _replay(stored.status_code, json.loads(stored.response))
+
+        commits = db.info.get("commits", 0)
+        try:
+            result = func(**kwargs)
+        except Exception:
+            db.rollback()
+            if db.info.get("commits", 0) == commits:
+                # the endpoint committed nothing, let the client retry the key
+                db.execute(delete(IdempotencyKey).where(IdempotencyKey.id == claim_id))
+            else:
+                # already applied: a retry must not apply it again
+                db.execute(
+                    update(IdempotencyKey)
+                    .where(IdempotencyKey.id == claim_id)
+                    .values(status_code=409, response=json.dumps(APPLIED_WITHOUT_RESPONSE))
+                )
+            db.commit()
+            raise
+
+        body = jsonable_encoder(result)
+        response = json.dumps(body)
+        db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == claim_id)
+            .values(status_code=200, response=response)
+        )
+        db.commit()
+        kv_store.set(cache_key, json.dumps({
+            "fingerprint": fingerprint, "status_code": 200, "body": body
+        }), ttl=IDEMPOTENCY_TTL)
+        return result
+
+    return wrapper
+
+
+def purge_expired_keys() -> int:
+    """Delete expired keys in one statement. Returns the number deleted."""
+    db = SessionLocal()
+    try:
+        deleted = db.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.expires_at < datetime.now(timezone.utc))
+        ).rowcount
+        db.commit()
+        return deleted
+    finally:
+        db.close()
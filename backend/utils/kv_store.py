@@ -0,0 +1,188 @@
+"""
+Small key/value store used for caches and shared counters.
+
+KV_BACKEND=memory (default) keeps everything in this process.
+KV_BACKEND=redis shares state between workers through REDIS_URL; any
+client speaking the redis-py API works. KV_BACKEND=fakeredis runs the
+same RedisStore code against an in-process fake (pip install fakeredis
+lupa), for checking the redis path locally.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+KV_BACKEND = os.getenv("KV_BACKEND", "memory").lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class MemoryStore:
+    """Thread-safe LRU dict with optional per-key TTL (seconds)."""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._items = OrderedDict()     # key -> (expires_at | None, value)
+
+    def _live(self, key):
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return item
+
+    def _put(self, key, value, ttl):
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._items[key] = (expires_at, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_keys:
+            self._items.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            item = self._live(key)
+            return item[1] if item else None
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._put(key, value, ttl)
+
+    def set_nx(self, key, value, ttl=None) -> bool:
+        with self._lock:
+            if self._live(key):
+                return False
+            self._put(key, value, ttl)
+            return True
+
+    def incr(self, key, amount: int = 1, ttl=None) -> int:
+        """Increment; ttl only applies when the key is created."""
+        with self._lock:
+            item = self._live(key)
+            if item is None:
+                value = amount
+                self._put(key, value, ttl)
+            else:
+                value = int(item[1]) + amount
+                self._items[key] = (item[0], value)
+            return value
+
+    def incr_existing(self, key, amount: int = 1):
+        """Increment only if the key exists; returns None otherwise."""
+        with self._lock:
+            item = self._live(key)
+            if item is None:
+                return None
+            value = int(item[1]) + amount
+            self._items[key] = (item[0], value)
+            return value
+
+    def take_token(self, key, capacity: float, rate: float, cost: float = 1):
+        """
+        Token bucket holding up to `capacity` tokens, refilled at `rate`
+        tokens per second. Returns (allowed, seconds until it would be).
+        """
+        now = time.monotonic()
+        with self._lock:
+            item = self._live(key)
+            tokens, last = item[1] if item else (capacity, now)
+            tokens = min(capacity, tokens + (now - last) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            # a full bucket is the same as no bucket, let it expire then
+            self._put(key, (tokens, now), max((capacity - tokens) / rate, 1))
+            return allowed, 0 if allowed else (cost - tokens) / rate
+
+    def pop(self, key):
+        """Get and delete in one step; None if missing."""
+        with self._lock:
+            item = self._live(key)
+            if item is None:
+                return None
+            del self._items[key]
+            return item[1]
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+
+class RedisStore:
+    """Same interface on top of a redis-py compatible client."""
+
+    INCR_EXISTING = (
+        "if redis.call('exists', KEYS[1]) == 1 then "
+        "return redis.call('incrby', KEYS[1], ARGV[1]) end"
+    )
+
+    TAKE_TOKEN = """
+        local capacity, rate, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+        local clock = redis.call('time')
+        local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+        local bucket = redis.call('hmget', KEYS[1], 'tokens', 'ts')
+        local tokens = tonumber(bucket[1]) or capacity
+        local ts = tonumber(bucket[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+        local allowed, wait = 0, (cost - tokens) / rate
+        if tokens >= cost then
+            tokens, allowed, wait = tokens - cost, 1, 0
+        end
+        redis.call('hset', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+        redis.call('expire', KEYS[1], math.max(1, math.ceil((capacity - tokens) / rate)))
+        return {allowed, tostring(wait)}
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._incr_existing = client.register_script(self.INCR_EXISTING)
+        self._take_token = client.register_script(self.TAKE_TOKEN)
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, value, ex=int(ttl) if ttl else None)
+
+    def set_nx(self, key, value, ttl=None) -> bool:
+        return bool(self.client.set(key, value, ex=int(ttl) if ttl else None, nx=True))
+
+    def incr(self, key, amount: int = 1, ttl=None) -> int:
+        pipe = self.client.pipeline()
+        pipe.incrby(key, amount)
+        if ttl:
+            pipe.expire(key, int(ttl), nx=True)
+        return int(pipe.execute()[0])
+
+    def incr_existing(self, key, amount: int = 1):
+        value = self._incr_existing(keys=[key], args=[amount])
+        return None if value is None else int(value)
+
+    def take_token(self, key, capacity: float, rate: float, cost: float = 1):
+        # server clock, so every worker refills the bucket the same way
+        allowed, wait = self._take_token(keys=[key], args=[capacity, rate, cost])
+        return bool(allowed), float(wait)
+
+    def pop(self, key):
+        return self.client.getdel(key)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+def make_store(backend: str = KV_BACKEND):
+    if backend == "redis":
+        import redis
+
+        return RedisStore(redis.Redis.from_url(REDIS_URL))
+    if backend == "fakeredis":
+        import fakeredis
+
+        return RedisStore(fakeredis.FakeRedis())
+    return MemoryStore()
+
+
+kv_store = make_store()
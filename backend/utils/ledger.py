@@ -0,0 +1,292 @@
+"""
+Append-only ledger behind account balances.
+
+Every balance change is an immutable row in ledger_entries: the opening
+balance of an account and one entry per transaction (signed amount).
+Write paths only INSERT, so concurrent writers never wait on the account
+row.
+
+accounts.balance is a snapshot: the sum of the account's entries up to
+accounts.ledger_entry_id. The live balance is the snapshot plus the
+entries after it (live_balance / live_balance_expr). compact_snapshots()
+folds new entries into the snapshots so that tail stays short and balance
+reads stay O(1).
+
+Entry ids come from a sequence but commit out of order: a long CSV import
+can still hold uncommitted entries while a quick POST commits a higher id.
+Moving ledger_entry_id past such an entry would drop it from the live
+balance for good, so on Postgres writers take a shared advisory lock per
+account until they commit, and compaction only folds accounts whose
+exclusive lock it gets right away (busy accounts wait for the next run).
+Holding it, every entry of the account is committed or gone. SQLite has a
+single writer, so there ids always commit in order.
+
+    python -m utils.ledger compact      # fold entries into snapshots
+    python -m utils.ledger reconcile    # verify snapshots and transactions
+"""
+import argparse
+import json
+import os
+import sys
+from decimal import Decimal
+
+from sqlalchemy import case, func, insert, select, text, update
+
+from database import SessionLocal
+from models import Account, LedgerEntry, Transaction
+from utils.balances import to_money
+
+LEDGER_COMPACT_INTERVAL = int(os.getenv("LEDGER_COMPACT_INTERVAL", "300"))
+LEDGER_COMPACT_BATCH = int(os.getenv("LEDGER_COMPACT_BATCH", "1000"))    # accounts per transaction
+LEDGER_LOCK_SPACE = 0x1ED6E     # first key of the two-key advisory locks on account ids
+
+
+def signed_amount(txn_type: str, amount) -> Decimal:
+    amount = to_money(amount)
+    return amount if txn_type == "credit" else -amount
+
+
+def _is_postgres(db) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+# ================= WRITES (append only) =================
+
+def lock_for_posting(db, account_ids):
+    """
+    Shared advisory lock per account until commit (Postgres only):
+    writers don't block each other, compaction skips these accounts.
+    """
+    if account_ids and _is_postgres(db):
+        db.execute(
+            text("SELECT pg_advisory_xact_lock_shared(:space, a) FROM unnest(CAST(:ids AS integer[])) AS a"),
+            {"space": LEDGER_LOCK_SPACE, "ids": sorted(set(account_ids))}
+        ).all()
+
+
+def post_entries(db, entries: list[dict]):
+    """
+    Append ledger entries: dicts with account_id, amount (signed) and
+    optionally kind / txn_id. One executemany INSERT, no commit.
+    """
+    if entries:
+        lock_for_posting(db, [e["account_id"] for e in entries])
+        db.execute(insert(LedgerEntry), [
+            {"kind": "transaction", "txn_id": None, **e} for e in entries
+        ])
+
+
+def post_transactions(db, txns):
+    """One entry per Transaction row (ORM objects or rows with the same fields)."""
+    post_entries(db, [
+        {
+            "account_id": t.account_id,
+            "amount": signed_amount(t.txn_type, t.amount),
+            "txn_id": t.id,
+        }
+        for t in txns
+    ])
+
+
+def open_account(db, account: Account, opening_balance):
+    """
+    Flush a new account and record its opening balance as the first
+    entry; the snapshot starts right after it.
+    """
+    account.balance = to_money(opening_balance or 0)
+    account.ledger_entry_id = 0
+    db.add(account)
+    db.flush()
+
+    lock_for_posting(db, [account.id])
+    entry_id = db.execute(
+        insert(LedgerEntry)
+        .values(account_id=account.id, amount=account.balance, kind="opening")
+        .returning(LedgerEntry.id)
+    ).scalar_one()
+    account.ledger_entry_id = entry_id
+    return account
+
+
+# ================= READS =================
+
+def _pending(account_id_col, after_col):
+    return func.coalesce(
+        select(func.sum(LedgerEntry.amount))
+        .where(LedgerEntry.account_id == account_id_col, LedgerEntry.id > after_col)
+        .scalar_subquery(),
+        0
+    )
+
+
+def live_balance_expr():
+    """Column expression for an account's live balance, use in select(Account...)."""
+    return Account.balance + _pending(Account.id, Account.ledger_entry_id)
+
+
+def live_balance(db, account_id: int):
+    return db.scalar(select(live_balance_expr()).where(Account.id == account_id))
+
+
+def user_balance_total(user_id: int):
+    """Scalar subquery: live balance summed over the user's accounts."""
+    return (
+        select(func.coalesce(func.sum(live_balance_expr()), 0))
+        .where(Account.user_id == user_id)
+        .scalar_subquery()
+    )
+
+
+# ================= MAINTENANCE =================
+
+def compact_snapshots(db, after: int = 0, limit: int = LEDGER_COMPACT_BATCH):
+    """
+    Fold pending entries into accounts.balance for up to `limit` accounts
+    with ids above `after`, skipping accounts a writer still holds.
+    Returns (accounts updated, last account id looked at, or None when
+    there are no more). Does not commit: commit to release the locks.
+    """
+    account_ids = db.scalars(
+        select(LedgerEntry.account_id)
+        .join(Account, Account.id == LedgerEntry.account_id)
+        .where(LedgerEntry.id > Account.ledger_entry_id, LedgerEntry.account_id > after)
+        .group_by(LedgerEntry.account_id)
+        .order_by(LedgerEntry.account_id)
+        .limit(limit)
+    ).all()
+    if not account_ids:
+        return 0, None
+    last = account_ids[-1]
+
+    if _is_postgres(db):
+        account_ids = db.scalars(
+            text("SELECT a FROM unnest(CAST(:ids AS integer[])) AS a WHERE pg_try_advisory_xact_lock(:space, a)"),
+            {"space": LEDGER_LOCK_SPACE, "ids": account_ids}
+        ).all()
+        if not account_ids:
+            return 0, last
+
+    # a new statement, so it sees everything committed before the locks were taken
+    pending = (
+        select(
+            LedgerEntry.account_id,
+            func.sum(LedgerEntry.amount).label("delta"),
+            func.max(LedgerEntry.id).label("last_id")
+        )
+        .join(Account, Account.id == LedgerEntry.account_id)
+        .where(LedgerEntry.id > Account.ledger_entry_id, LedgerEntry.account_id.in_(account_ids))
+        .group_by(LedgerEntry.account_id)
+        .subquery()
+    )
+    updated = db.execute(
+        update(Account)
+        .where(Account.id == pending.c.account_id)
+        .values(
+            balance=Account.balance + pending.c.delta,
+            ledger_entry_id=pending.c.last_id
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    return updated, last
+
+
+def compact_all(db) -> int:
+    """compact_snapshots over every account, one commit per batch."""
+    after, total = 0, 0
+    while after is not None:
+        updated, after = compact_snapshots(db, after)
+        db.commit()
+        total += updated
+    return total
+
+
+def compact() -> int:
+    """compact_all in its own session, for the scheduler and CLI."""
+    db = SessionLocal()
+    try:
+        return compact_all(db)
+    finally:
+        db.close()
+
+
+def reconcile(db, batch_size: int = 5000):
+    """
+    Verify every account in one streaming pass: per-account ledger totals
+    merged (both ordered by account id) with per-account transaction
+    totals. Yields one dict per problem:
+      - snapshot: accounts.balance != sum of entries up to ledger_entry_id
+      - transactions: posted entries != the account's transactions
+    """
+    is_posted = LedgerEntry.kind == "transaction"
+    ledger = db.execute(
+        select(
+            Account.id,
+            Account.balance,
+            func.coalesce(func.sum(case(
+                (LedgerEntry.id <= Account.ledger_entry_id, LedgerEntry.amount), else_=0
+            )), 0).label("settled"),
+            func.coalesce(func.sum(case((is_posted, LedgerEntry.amount), else_=0)), 0).label("posted"),
+            func.count(case((is_posted, LedgerEntry.id))).label("posted_count")
+        )
+        .outerjoin(LedgerEntry, LedgerEntry.account_id == Account.id)
+        .group_by(Account.id, Account.balance)
+        .order_by(Account.id)
+        .execution_options(yield_per=batch_size)
+    )
+    txn_totals = db.execute(
+        select(
+            Transaction.account_id,
+            func.coalesce(func.sum(case(
+                (Transaction.txn_type == "credit", Transaction.amount),
+                else_=-Transaction.amount
+            )), 0).label("total"),
+            func.count().label("count")
+        )
+        .group_by(Transaction.account_id)
+        .order_by(Transaction.account_id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    txns = next(txn_totals, None)
+    for row in ledger:
+        while txns is not None and txns.account_id < row.id:
+            txns = next(txn_totals, None)
+        if txns is not None and txns.account_id == row.id:
+            txn_total, txn_count = to_money(txns.total), txns.count
+        else:
+            txn_total, txn_count = Decimal(0), 0
+
+        if to_money(row.balance) != to_money(row.settled):
+            yield {
+                "account_id": row.id, "problem": "snapshot",
+                "snapshot": str(row.balance), "ledger": str(row.settled)
+            }
+
+        if to_money(row.posted) != txn_total or row.posted_count != txn_count:
+            yield {
+                "account_id": row.id, "problem": "transactions",
+                "ledger": str(row.posted), "ledger_entries": row.posted_count,
+                "transactions": str(txn_total), "transaction_count": txn_count
+            }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ledger maintenance")
+    parser.add_argument("command", choices=["compact", "reconcile"])
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        print(f"{compact()} account snapshots updated")
+        sys.exit(0)
+
+    db = SessionLocal()
+    try:
+        problems = 0
+        for problem in reconcile(db):
+            problems += 1
+            print(json.dumps(problem))
+    finally:
+        db.close()
+
+    print(f"{problems} problems found", file=sys.stderr)
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,165 @@
+"""
+Request metrics in the Prometheus text format, no client library needed.
+
+TimingMiddleware times every HTTP request and counts its SQL statements
+and DB time through database.query_stats. It records them per route
+template (e.g. /transactions/{account_id}, never the raw path), and adds
+a Server-Timing header so browser dev tools show DB vs app time.
+
+GET /metrics renders everything below plus the DB pool stats. Numbers are
+per process: with several uvicorn workers scrape each one, or read them as
+a sample.
+"""
+import threading
+import time
+
+from database import QueryStats, pool_stats, query_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values) -> str:
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels=()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                yield f"{self.name}{_labels(self.labels, values)} {total}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self._series = {}       # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._series.setdefault(label_values, [0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            for values, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    labels = _labels(self.labels + ("le",), values + (bound,))
+                    yield f"{self.name}_bucket{labels} {count}"
+                yield f"{self.name}_bucket{_labels(self.labels + ('le',), values + ('+Inf',))} {series[-1]}"
+                yield f"{self.name}_sum{_labels(self.labels, values)} {series[-2]}"
+                yield f"{self.name}_count{_labels(self.labels, values)} {series[-1]}"
+
+
+# ================= METRICS =================
+
+http_requests = Counter(
+    "http_requests_total", "HTTP requests by route and status",
+    ("method", "route", "status")
+)
+http_latency = Histogram(
+    "http_request_duration_seconds", "HTTP request latency",
+    ("method", "route")
+)
+http_db_statements = Histogram(
+    "http_request_db_statements", "SQL statements issued per request",
+    ("method", "route"), buckets=STATEMENT_BUCKETS
+)
+http_db_seconds = Counter(
+    "http_request_db_seconds_total", "Time spent in SQL statements by route",
+    ("method", "route")
+)
+slow_queries = Counter(
+    "db_slow_queries_total", "Statements slower than DB_SLOW_QUERY_MS by route",
+    ("method", "route")
+)
+
+METRICS = (http_requests, http_latency, http_db_statements, http_db_seconds, slow_queries)
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+
+    for name, value in pool_stats().items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f"# TYPE db_pool_{name} gauge")
+            lines.append(f"db_pool_{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# ================= MIDDLEWARE =================
+
+def route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class TimingMiddleware:
+    """ASGI middleware: metrics + Server-Timing for every HTTP request."""
+
+    def __init__(self, app, timing_allow_origin: str = None):
+        self.app = app
+        self.timing_allow_origin = timing_allow_origin
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats()
+        token = query_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total_ms = (time.perf_counter() - started) * 1000
+                db_ms = stats.seconds * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", (
+                    f'db;dur={db_ms:.1f};desc="{stats.count} queries", '
+                    f"app;dur={max(total_ms - db_ms, 0):.1f}, "
+                    f"total;dur={total_ms:.1f}"
+                ).encode()))
+                if self.timing_allow_origin:
+                    headers.append((b"timing-allow-origin", self.timing_allow_origin.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            query_stats.reset(token)
+            method, route = scope["method"], route_template(scope)
+            http_requests.inc(method, route, status)
+            http_latency.observe(time.perf_counter() - started, method, route)
+            http_db_statements.observe(stats.count, method, route)
+            http_db_seconds.inc(method, route, amount=stats.seconds)
+            if stats.slow:
+                slow_queries.inc(method, route, amount=stats.slow)
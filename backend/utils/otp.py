@@ -0,0 +1,76 @@
+"""
+One-time codes for the forgot-password flow, kept in kv_store so any
+worker can verify a code another worker issued (KV_BACKEND=redis when
+there is more than one process).
+
+    issue_otp(email)              -> code, valid for OTP_TTL seconds
+    verify_otp(email, code)       -> True once; opens a reset window
+    consume_reset_window(email)   -> True at most once per verification
+
+Every key expires on its own, so nothing needs cleaning up. After
+OTP_MAX_ATTEMPTS wrong guesses the code is burnt and a new one must be
+requested.
+"""
+import hmac
+import os
+import secrets
+
+from fastapi import HTTPException
+
+from utils.kv_store import kv_store
+
+OTP_TTL = int(os.getenv("OTP_TTL", "300"))
+OTP_MAX_ATTEMPTS = int(os.getenv("OTP_MAX_ATTEMPTS", "5"))
+RESET_WINDOW_TTL = int(os.getenv("RESET_WINDOW_TTL", "600"))
+
+
+def _otp_key(email: str) -> str:
+    return f"otp:{email}"
+
+
+def _attempts_key(email: str) -> str:
+    return f"otp-attempts:{email}"
+
+
+def _reset_key(email: str) -> str:
+    return f"otp-verified:{email}"
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def issue_otp(email: str) -> str:
+    """New 6-digit code; replaces any earlier code and attempt count."""
+    otp = f"{secrets.randbelow(10 ** 6):06d}"
+    kv_store.delete(_attempts_key(email))
+    kv_store.delete(_reset_key(email))
+    kv_store.set(_otp_key(email), otp, ttl=OTP_TTL)
+    return otp
+
+
+def verify_otp(email: str, otp: str) -> bool:
+    """
+    Check a code. Counts every attempt; once OTP_MAX_ATTEMPTS is passed
+    the code is deleted and this raises 429.
+    """
+    attempts = kv_store.incr(_attempts_key(email), ttl=OTP_TTL)
+    if attempts > OTP_MAX_ATTEMPTS:
+        kv_store.delete(_otp_key(email))
+        raise HTTPException(status_code=429, detail="Too many attempts, request a new OTP")
+
+    stored = _text(kv_store.get(_otp_key(email)))
+    # bytes: compare_digest raises TypeError on non-ASCII str
+    if stored is None or not hmac.compare_digest(stored.encode(), (otp or "").encode()):
+        return False
+
+    # single use: only the request that removes the code wins
+    if kv_store.pop(_otp_key(email)) is None:
+        return False
+    kv_store.delete(_attempts_key(email))
+    kv_store.set(_reset_key(email), "1", ttl=RESET_WINDOW_TTL)
+    return True
+
+
+def consume_reset_window(email: str) -> bool:
+    return kv_store.pop(_reset_key(email)) is not None
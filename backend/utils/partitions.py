@@ -0,0 +1,80 @@
+"""
+Monthly range partitions for the transactions table (Postgres only).
+
+The table is converted by migration 0003. After that the app creates
+partitions for upcoming months at startup and then every
+TXN_PARTITION_INTERVAL seconds (daily). With that job disabled, run this
+module from cron instead:
+
+    python -m utils.partitions
+"""
+import logging
+import os
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from utils.dates import add_months
+
+log = logging.getLogger(__name__)
+
+TXN_PARTITIONS_AHEAD = int(os.getenv("TXN_PARTITIONS_AHEAD", "3"))
+TXN_PARTITION_INTERVAL = int(os.getenv("TXN_PARTITION_INTERVAL", "86400"))
+
+
+def partition_name(month: date) -> str:
+    return f"transactions_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned(conn) -> bool:
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = 'transactions'"
+    )).first() is not None
+
+
+def create_month_partitions(conn, first: date, last: date):
+    """Create one partition per month in [first, last], skipping existing ones."""
+    created = []
+    month = date(first.year, first.month, 1)
+    while month <= last:
+        name = partition_name(month)
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF transactions "
+            f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        ))
+        created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def ensure_transaction_partitions(engine, months_ahead: int = TXN_PARTITIONS_AHEAD):
+    if engine.dialect.name != "postgresql":
+        return []
+
+    with engine.connect() as conn:
+        if not is_partitioned(conn):
+            return []
+
+    this_month = date.today().replace(day=1)
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(this_month, offset)
+        # one transaction per partition: a clash with rows already in the
+        # default partition must not stop the remaining months
+        try:
+            with engine.begin() as conn:
+                created += create_month_partitions(conn, month, month)
+        except DBAPIError as e:
+            log.warning("could not create partition %s: %s", partition_name(month), e)
+
+    return created
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    print("\n".join(ensure_transaction_partitions(engine)) or "nothing to do")
@@ -0,0 +1,106 @@
+"""
+Password hashing off the request threadpool.
+
+bcrypt is deliberately slow (~250 ms at cost 12), so hashing inline in
+sync endpoints lets a login storm occupy every threadpool thread and
+every core, and stall unrelated requests. Hashes run in a dedicated pool
+of PASSWORD_HASH_WORKERS processes instead (0 = inline, for tests and
+tiny deployments).
+
+At most PASSWORD_HASH_MAX_PENDING operations may be running or queued at
+once; beyond that callers get 429 immediately rather than piling up
+threadpool threads behind the pool.
+
+BCRYPT_ROUNDS sets the cost. When it changes, existing hashes are
+upgraded on the next successful login (verify_and_update).
+
+This module imports nothing from the app, so worker processes start fast.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(os.cpu_count() or 1, 4))))
+PASSWORD_HASH_MAX_PENDING = int(
+    os.getenv("PASSWORD_HASH_MAX_PENDING", str(4 * max(PASSWORD_HASH_WORKERS, 1)))
+)
+
+# the one password context of the app
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+# ================= WORKER SIDE =================
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed: str):
+    try:
+        return pwd_context.verify_and_update(password, hashed)
+    except ValueError:
+        # not a hash this context knows
+        return False, None
+
+
+# ================= POOL =================
+
+class PasswordHasher:
+    """Bounded front for the hashing processes."""
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._executor = None
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process full of threads and DB connections is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _run(self, func, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HTTPException(
+                    status_code=429,
+                    detail="Too many password requests, try again shortly",
+                    headers={"Retry-After": "1"}
+                )
+            self._pending += 1
+        try:
+            if self.workers <= 0:
+                return func(*args)
+            return self._pool().submit(func, *args).result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password)
+
+    def verify_and_update(self, password: str, hashed: str):
+        """(ok, new_hash); new_hash is set when the stored hash is outdated."""
+        if not hashed:
+            return False, None
+        return self._run(_verify_and_update, password, hashed)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+password_hasher = PasswordHasher()
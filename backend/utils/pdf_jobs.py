@@ -0,0 +1,245 @@
+import hashlib
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from sqlalchemy import func
+
+from database import SessionLocal
+from models import Transaction, Account
+
+EXPORT_DIR = "exports"
+# render processes; 0 renders on a thread of the API process instead
+# (in-memory SQLite, tests)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+PDF_MAX_JOBS = int(os.getenv("PDF_MAX_JOBS", "1000"))
+
+_executor = None
+_jobs = OrderedDict()       # (user_id, job_id) -> {"status", "path", "error"}, oldest first
+JOB_ID_RE = re.compile(r"^[0-9a-f]{16}-[0-9a-f]{12}$")
+_lock = threading.Lock()
+
+
+def _remember(key, job):
+    """
+    Track a job (call with _lock held). Past PDF_MAX_JOBS the oldest
+    finished jobs are forgotten; rendered files are still found on disk.
+    """
+    _jobs[key] = job
+    _jobs.move_to_end(key)
+    excess = len(_jobs) - PDF_MAX_JOBS
+    if excess > 0:
+        finished = [k for k, j in _jobs.items() if j["status"] != "pending"]
+        for old in finished[:excess]:
+            del _jobs[old]
+
+
+def _filtered(query, user_id, filters):
+    query = query.join(Account).filter(Account.user_id == user_id)
+
+    if filters.get("account_id") is not None:
+        query = query.filter(Transaction.account_id == filters["account_id"])
+    if filters.get("date_from"):
+        query = query.filter(Transaction.txn_date >= filters["date_from"])
+    if filters.get("date_to"):
+        query = query.filter(Transaction.txn_date < filters["date_to"])
+
+    return query
+
+
+def data_version(db, user_id, filters):
+    # cheap fingerprint of the rows that would end up in the report
+    count, last_id = _filtered(
+        db.query(func.count(Transaction.id), func.max(Transaction.id)),
+        user_id,
+        filters
+    ).one()
+    return f"{count}.{last_id or 0}"
+
+
+def _filter_key(filters):
+    raw = "|".join(
+        f"{k}={filters.get(k) or ''}"
+        for k in ("account_id", "date_from", "date_to")
+    )
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def artifact_path(user_id, job_id):
+    return os.path.join(EXPORT_DIR, str(user_id), f"{job_id}.pdf")
+
+
+def _render(job_id, user_id, filters, submitted):
+    """
+    Worker side: render one statement and publish it. Returns the job ids
+    of the older versions it removed.
+
+    The published file's mtime is set to when the job was submitted (its
+    data version computed), so renders finishing out of order only remove
+    versions submitted before theirs, never a newer one.
+    """
+    path = artifact_path(user_id, job_id)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    db = SessionLocal()
+    try:
+        rows = _filtered(
+            db.query(
+                Transaction.txn_date,
+                Transaction.description,
+                Transaction.amount,
+                Transaction.txn_type
+            ),
+            user_id,
+            filters
+        ).execution_options(stream_results=True, yield_per=1000)
+
+        c = canvas.Canvas(tmp_path, pagesize=A4)
+        width, height = A4
+
+        y = height - 50
+        c.setFont("Helvetica", 10)
+        c.drawString(50, y, "Transaction Report")
+
+        y -= 30
+
+        for txn in rows:
+            txn_day = txn.txn_date.date() if txn.txn_date else ""
+            text = f"{txn_day} | {txn.description} | {txn.amount} | {txn.txn_type}"
+            c.drawString(50, y, text)
+            y -= 15
+
+            if y < 50:
+                c.showPage()
+                y = height - 50
+
+        c.save()
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        db.close()
+
+    # publish atomically, then drop versions of the same report submitted earlier
+    os.utime(tmp_path, (submitted, submitted))
+    os.replace(tmp_path, path)
+
+    directory = os.path.dirname(path)
+    prefix = job_id.split("-")[0]
+    removed = []
+    for name in os.listdir(directory):
+        if not name.startswith(prefix) or not name.endswith(".pdf") or name == os.path.basename(path):
+            continue
+        try:
+            if os.path.getmtime(os.path.join(directory, name)) < submitted:
+                os.remove(os.path.join(directory, name))
+                removed.append(name[:-4])
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def _finished(user_id, job_id, future):
+    with _lock:
+        job = _jobs.get((user_id, job_id))
+        try:
+            removed = future.result()
+        except Exception as e:
+            if job:
+                job.update(status="failed", error=str(e))
+            return
+
+        if job:
+            job.update(status="done", path=artifact_path(user_id, job_id))
+        for old_id in removed:
+            _jobs.pop((user_id, old_id), None)
+
+
+def _pool():
+    global _executor
+    with _lock:
+        if _executor is None:
+            if PDF_WORKERS > 0:
+                # spawn: forking a process full of threads and DB connections is unsafe
+                _executor = ProcessPoolExecutor(
+                    max_workers=PDF_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf")
+        return _executor
+
+
+def shutdown_pdf_pool():
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(cancel_futures=True)
+
+
+def _reuse_artifact(path, submitted) -> bool:
+    """
+    Stamp an existing artifact with this submission, so a render of an
+    older version finishing later won't remove it. False when it is gone.
+    """
+    try:
+        os.utime(path, (submitted, submitted))
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def submit_pdf_job(db, user_id, filters):
+    """
+    Queue a statement render and return its job.
+    Job ids are derived from (user, filters, data version), so an
+    unchanged statement is served straight from the cached artifact
+    and identical in-flight requests share one render.
+    """
+    submitted = time.time()
+    version = data_version(db, user_id, filters)
+    job_id = f"{_filter_key(filters)}-{hashlib.sha1(version.encode()).hexdigest()[:12]}"
+    path = artifact_path(user_id, job_id)
+
+    with _lock:
+        job = _jobs.get((user_id, job_id))
+        if job and job["status"] == "pending":
+            return job_id, dict(job)
+
+        if _reuse_artifact(path, submitted):
+            job = {"status": "done", "path": path, "error": None}
+            _remember((user_id, job_id), job)
+            return job_id, dict(job)
+
+        job = {"status": "pending", "path": None, "error": None}
+        _remember((user_id, job_id), job)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    future = _pool().submit(_render, job_id, user_id, filters, submitted)
+    future.add_done_callback(lambda f: _finished(user_id, job_id, f))
+    return job_id, dict(job)
+
+
+def get_pdf_job(user_id, job_id):
+    if not JOB_ID_RE.match(job_id):
+        return None
+
+    with _lock:
+        job = _jobs.get((user_id, job_id))
+        if job:
+            return dict(job)
+
+    # rendered by another worker process sharing the export dir
+    path = artifact_path(user_id, job_id)
+    if os.path.exists(path):
+        return {"status": "done", "path": path, "error": None}
+
+    return None
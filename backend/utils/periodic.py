@@ -0,0 +1,18 @@
+import asyncio
+import logging
+
+log = logging.getLogger(__name__)
+
+
+async def run_periodically(name: str, func, interval: int):
+    """
+    Background task: call the sync func every interval seconds in a
+    worker thread. Failures are logged and retried on the next tick.
+    """
+    while True:
+        try:
+            result = await asyncio.to_thread(func)
+            log.info("%s: %s", name, result)
+        except Exception:
+            log.exception("%s failed", name)
+        await asyncio.sleep(interval)
@@ -0,0 +1,53 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class PrincipalCache:
+    """
+    LRU + TTL cache of authenticated user rows, keyed by user id.
+    Values are plain column dicts so every request gets its own object.
+    Call invalidate() whenever a user row changes or is deleted.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items = OrderedDict()     # user_id -> (expires_at, values)
+
+    def get(self, user_id: int):
+        with self._lock:
+            item = self._items.get(user_id)
+            if item is None:
+                return None
+
+            expires_at, values = item
+            if expires_at < time.monotonic():
+                del self._items[user_id]
+                return None
+
+            self._items.move_to_end(user_id)
+            return values
+
+    def set(self, user_id: int, values: dict):
+        with self._lock:
+            self._items[user_id] = (time.monotonic() + self.ttl, values)
+            self._items.move_to_end(user_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._items.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+principal_cache = PrincipalCache(
+    max_size=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+)
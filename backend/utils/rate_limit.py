@@ -0,0 +1,106 @@
+"""
+Token-bucket rate limiting for the whole API.
+
+Each request is charged to one bucket: the first RATE_LIMITS entry whose
+method and path prefix match, else the default budget. Buckets are per
+client, which is the user id from a valid bearer token, or else the
+client IP. Entries with the same name share a bucket.
+Buckets live in kv_store, so with KV_BACKEND=redis every worker draws
+from the same budget.
+
+Over budget the request is answered with 429 and Retry-After before it
+reaches a route, so an expensive endpoint being hammered costs nothing
+but a kv_store call. If the store itself fails the request is let
+through: a broken limiter must not take the API down with it.
+"""
+import logging
+import math
+import os
+
+from jose import jwt, JWTError
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from auth import SECRET_KEY, ALGORITHM
+from utils.kv_store import kv_store
+
+log = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_DEFAULT = int(os.getenv("RATE_LIMIT_DEFAULT", "600"))      # requests per minute
+# behind a reverse proxy the client address is in X-Forwarded-For
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true"
+
+# (bucket name, method, path prefix, requests, per seconds)
+RATE_LIMITS = [
+    ("login", "POST", "/users/login", 10, 60),
+    ("register", "POST", "/users/register", 5, 60),
+    ("password-reset", "POST", "/users/forgot-password", 5, 300),
+    ("password-reset", "POST", "/users/verify-forgot-otp", 5, 300),
+    ("password-reset", "POST", "/users/reset-password", 5, 300),
+    ("csv-upload", "POST", "/transactions/upload-csv", 5, 60),
+    ("csv-export", "GET", "/exports/transactions/csv", 10, 60),
+    ("pdf-export", "POST", "/exports/transactions/pdf", 5, 60),
+    ("insights", "GET", "/insights/", 120, 60),
+]
+DEFAULT_LIMIT = ("default", None, "", RATE_LIMIT_DEFAULT, 60)
+
+EXEMPT_PREFIXES = ("/health/", "/docs", "/openapi.json")
+
+
+def match_limit(method: str, path: str):
+    for limit in RATE_LIMITS:
+        _, limit_method, prefix, _, _ = limit
+        if limit_method == method and path.startswith(prefix):
+            return limit
+    return DEFAULT_LIMIT
+
+
+def client_key(scope, headers: Headers) -> str:
+    authorization = headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        try:
+            payload = jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM])
+            return f"user:{int(payload['sub'])}"
+        except (JWTError, KeyError, ValueError):
+            pass
+
+    if RATE_LIMIT_TRUST_PROXY and headers.get("x-forwarded-for"):
+        return "ip:" + headers["x-forwarded-for"].split(",")[0].strip()
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """ASGI middleware; add it inside CORS so 429s still carry CORS headers."""
+
+    def __init__(self, app, store=kv_store):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not RATE_LIMIT_ENABLED
+            or scope["method"] == "OPTIONS"
+            or scope["path"].startswith(EXEMPT_PREFIXES)
+        ):
+            return await self.app(scope, receive, send)
+
+        name, _, _, requests, per = match_limit(scope["method"], scope["path"])
+        key = f"rl:{name}:{client_key(scope, Headers(scope=scope))}"
+        try:
+            allowed, retry_after = self.store.take_token(key, requests, requests / per)
+        except Exception:
+            log.exception("rate limiter unavailable, letting %s through", scope["path"])
+            allowed = True
+
+        if not allowed:
+            response = JSONResponse(
+                {"detail": "Too many requests, slow down"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+            return await response(scope, receive, send)
+
+        await self.app(scope, receive, send)
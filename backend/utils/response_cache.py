@@ -0,0 +1,76 @@
+import functools
+import hashlib
+import json
+import os
+import time
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+from utils.kv_store import kv_store
+
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+
+
+def user_version(user_id: int) -> int:
+    """
+    Current data version for a user. Starts from a timestamp, not 0,
+    so versions (and ETags) never repeat after a restart or cache flush.
+    """
+    key = f"datav:{user_id}"
+    version = kv_store.get(key)
+    if version is None:
+        kv_store.set_nx(key, int(time.time() * 1000))
+        version = kv_store.get(key)
+    return int(version)
+
+
+def bump_user_version(user_id: int):
+    """Call after committing any change to the user's transactions."""
+    user_version(user_id)
+    kv_store.incr(f"datav:{user_id}")
+
+
+def time_bucket(user_id: int) -> int:
+    """
+    Current RESPONSE_CACHE_TTL-long window, offset per user so caches
+    don't all turn over at once. Part of every ETag: a version bumped on
+    another worker (in-memory backend) or a window like "last 30 days"
+    moving on is picked up within RESPONSE_CACHE_TTL.
+    """
+    return int(time.time() + user_id % RESPONSE_CACHE_TTL) // RESPONSE_CACHE_TTL
+
+
+def cache_per_user(func):
+    """
+    Cache a GET endpoint's JSON per (user, data version, URL, time bucket).
+    The endpoint must take `request` and `current_user` parameters.
+    Sends an ETag and answers If-None-Match with 304 without touching
+    the cache or the database.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        request = kwargs["request"]
+        user_id = kwargs["current_user"].id
+
+        version = user_version(user_id)
+        url = f"{request.url.path}?{request.url.query}"
+        bucket = time_bucket(user_id)
+        digest = hashlib.sha1(f"{user_id}:{version}:{url}:{bucket}".encode()).hexdigest()
+        etag = f'W/"{digest}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+
+        key = f"resp:{digest}"
+        body = kv_store.get(key)
+        if body is None:
+            result = await func(*args, **kwargs)
+            body = json.dumps(jsonable_encoder(result)).encode()
+            kv_store.set(key, body, ttl=RESPONSE_CACHE_TTL)
+
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    return wrapper
@@ -1,6 +1,6 @@
 import { NavLink, Outlet, useNavigate } from "react-router-dom";
 import { useState, useEffect } from "react";
-import { getAlerts } from "../services/alertsService";
+import { getAlerts, subscribeAlerts } from "../services/alertsService";
 import { useAuth } from "../context/AuthContext";
 import ProfileImageUpload from "../components/ProfileImageUpload";
 
@@ -38,12 +38,12 @@ export default function MainLayout() {
     navigate("/login");
   };
 
-  /* 🔔 LOAD ALERTS */
+  /* 🔔 LOAD ALERTS ONCE, THEN LIVE UPDATES (NO POLLING) */
   useEffect(() => {
     const loadAlerts = async () => {
       try {
         const data = await getAlerts();
-        const unread = data.filter((a) => !a.read);
+        const unread = data.filter((a) => !a.is_read);
         setAlerts(unread.slice(0, 5));
       } catch {
         console.error("Failed to load alerts");
@@ -51,8 +51,9 @@ export default function MainLayout() {
     };
 
     loadAlerts();
-    const interval = setInterval(loadAlerts, 30000);
-    return () => clearInterval(interval);
+    return subscribeAlerts({
+      onAlert: (alert) => setAlerts((prev) => [alert, ...prev].slice(0, 5)),
+    });
   }, []);
 
   /* 🔔 OPEN NOTIFICATIONS */
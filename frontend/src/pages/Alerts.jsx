@@ -1,5 +1,6 @@
 import { useEffect, useState } from "react";
 import API from "../utils/api";
+import { subscribeAlerts } from "../services/alertsService";
 
 export default function Alerts() {
   const [alerts, setAlerts] = useState([]);
@@ -12,6 +13,20 @@ export default function Alerts() {
     loadUnreadCount();
   }, [filter]);
 
+  /* 🔔 LIVE: new alerts and unread count pushed by the server */
+  useEffect(() => {
+    const applyUnread = (unread) =>
+      unread === null ? loadUnreadCount() : setUnreadCount(unread);
+
+    return subscribeAlerts({
+      onAlert: (alert, unread) => {
+        if (filter !== "read") setAlerts((prev) => [alert, ...prev]);
+        applyUnread(unread);
+      },
+      onUnread: applyUnread,
+    });
+  }, [filter]);
+
   const loadAlerts = async () => {
     try {
       setLoading(true);
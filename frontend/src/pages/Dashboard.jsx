@@ -34,16 +34,12 @@ export default function Dashboard() {
   const loadDashboard = async () => {
     try {
       const summaryRes = await API.get("/dashboard/summary");
-      const txRes = await API.get("/transactions");
-
-      // sort + take ONLY 5 latest transactions
-      const lastFive = txRes.data
-        .slice()
-        .sort(
-          (a, b) =>
-            new Date(b.txn_date) - new Date(a.txn_date)
-        )
-        .slice(0, 5);
+      const txRes = await API.get("/transactions", {
+        params: { limit: 5 },
+      });
+
+      // server returns newest first, one page of 5
+      const lastFive = txRes.data.items;
 
       setSummary(summaryRes.data);
       setSpending(summaryRes.data.spending_distribution || []);
@@ -1,6 +1,6 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import API from "../utils/api";
-import { fetchRewards } from "../services/rewardsService";
+import { fetchRewards, redeemRewards } from "../services/rewardsService";
 
 const MIN_REDEEM_POINTS = 10;
 
@@ -16,6 +16,7 @@ export default function Rewards() {
   const [accounts, setAccounts] = useState([]);
   const [accountId, setAccountId] = useState("");
   const [redeeming, setRedeeming] = useState(false);
+  const idempotencyKey = useRef(null);
 
   // =============================
   // LOAD DATA
@@ -59,19 +60,27 @@ export default function Rewards() {
     )
       return;
 
+    // same key until the server answers, so a retry after a timeout
+    // replays the first redemption instead of redeeming twice
+    idempotencyKey.current ??= crypto.randomUUID();
+
     try {
       setRedeeming(true);
 
-      const res = await API.post(
-        `/rewards/redeem?account_id=${accountId}&points=${redeemablePoints}`
+      const data = await redeemRewards(
+        accountId,
+        redeemablePoints,
+        idempotencyKey.current
       );
+      idempotencyKey.current = null;
 
       alert(
-        `₹${res.data.credited_amount} credited successfully\nRemaining points: ${res.data.remaining_points}`
+        `₹${data.credited_amount} credited successfully\nRemaining points: ${data.remaining_points}`
       );
 
       await loadData();
     } catch (err) {
+      if (err.response) idempotencyKey.current = null;
       alert(err.response?.data?.detail || "Redeem failed");
     } finally {
       setRedeeming(false);
@@ -1,4 +1,4 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import API from "../utils/api";
 import { formatINR } from "../utils/format";
 import { exportCSV, exportPDF } from "../services/exportService";
@@ -25,6 +25,7 @@ export default function Transactions() {
   const [type, setType] = useState("credit");
   const [txnDate, setTxnDate] = useState("");
   const [merchant, setMerchant] = useState("");
+  const idempotencyKey = useRef(null);
 
   /* ------------------ FETCH ACCOUNTS ------------------ */
   useEffect(() => {
@@ -86,6 +87,10 @@ export default function Transactions() {
       return;
     }
 
+    // same key until the server answers, so a retry after a dropped
+    // connection replays instead of adding the transaction twice
+    idempotencyKey.current ??= crypto.randomUUID();
+
     try {
       await API.post("/transactions/", {
         account_id: Number(selectedAccount),
@@ -95,7 +100,10 @@ export default function Transactions() {
         txn_type: type.toLowerCase(),
         currency,
         txn_date: txnDate || null,
+      }, {
+        headers: { "Idempotency-Key": idempotencyKey.current },
       });
+      idempotencyKey.current = null;
 
       alert("Transaction added successfully ✅");
 
@@ -109,6 +117,7 @@ export default function Transactions() {
       const res = await API.get(`/transactions/${selectedAccount}`);
       setTransactions(res.data);
     } catch (err) {
+      if (err.response) idempotencyKey.current = null;
       console.error(err);
       alert("Failed to add transaction ❌");
     }
@@ -4,3 +4,21 @@ export const getAlerts = async () => {
   const res = await API.get("/alerts");
   return res.data;
 };
+// Live alerts over Server-Sent Events. Returns an unsubscribe function.
+// onAlert(alert, unread) for each new alert, onUnread(unread) when the
+// count changes; unread is null when the server has no cached count.
+export const subscribeAlerts = ({ onAlert, onUnread }) => {
+  const token = localStorage.getItem("token");
+  const url = `${API.defaults.baseURL}/alerts/stream?token=${encodeURIComponent(token)}`;
+  const source = new EventSource(url);
+
+  source.addEventListener("alert", (e) => {
+    const data = JSON.parse(e.data);
+    onAlert?.(data.alert, data.unread);
+  });
+  source.addEventListener("unread", (e) => {
+    onUnread?.(JSON.parse(e.data).unread);
+  });
+
+  return () => source.close();
+};
@@ -32,11 +32,25 @@ export const exportCSV = async () => {
 
 /**
  * Export Transactions as PDF
+ * Rendering runs as a background job: start it, poll, then download.
  */
 export const exportPDF = async () => {
   try {
+    const { data: job } = await API.post("/exports/transactions/pdf");
+
+    let status = job.status;
+    while (status === "pending") {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      const res = await API.get(`/exports/jobs/${job.job_id}`);
+      status = res.data.status;
+    }
+
+    if (status !== "done") {
+      throw new Error("PDF render failed");
+    }
+
     const response = await API.get(
-      "/exports/transactions/pdf",
+      `/exports/jobs/${job.job_id}/download`,
       {
         responseType: "blob", // IMPORTANT
       }
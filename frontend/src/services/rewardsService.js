@@ -18,7 +18,12 @@ export const deleteRewardApi = async (id) => {
   const res = await api.delete(`/rewards/${id}`);
   return res.data;
 };
-export const redeemRewards = async (accountId) => {
-  const res = await API.post(`/rewards/redeem?account_id=${accountId}`);
+// pass the same idempotencyKey when retrying until the server answers
+export const redeemRewards = async (accountId, points, idempotencyKey) => {
+  const res = await api.post(
+    `/rewards/redeem?account_id=${accountId}&points=${points}`,
+    null,
+    { headers: { "Idempotency-Key": idempotencyKey } }
+  );
   return res.data;
 };
\ No newline at end of file